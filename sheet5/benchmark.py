@@ -0,0 +1,113 @@
+from ex2 import *
+from random import Random, seed
+from time import perf_counter
+import os
+import tempfile
+import tracemalloc
+
+# a random formula in conjunctive normal form with clauses of length 3 over variables x0, ..., x(n-1)
+def random_3cnf(n, clauses, rng):
+    formula = None
+    for _ in range(clauses):
+        clause = None
+        for v in rng.sample(range(n), 3):
+            literal = Variable("x" + str(v)) if rng.random() < 0.5 else Not(Variable("x" + str(v)))
+            clause = literal if clause is None else Or(clause, literal)
+        formula = clause if formula is None else And(formula, clause)
+    return formula
+
+def measure(f, *args, **kwargs):
+    start = perf_counter()
+    result = f(*args, **kwargs)
+    return result, perf_counter() - start
+
+def simplify_loop(formula):
+    prev = str(formula)
+    cur = formula.simplified()
+    while str(cur) != prev:
+        prev, cur = str(cur), cur.simplified()
+    return cur
+
+# time an operation over all formulas of the corpus and measure its peak memory in a separate run
+# (tracemalloc slows the program down, so it is not active while timing)
+def run_suite(name, formulas, operation):
+    _, elapsed = measure(lambda: [operation(f) for f in formulas])
+    tracemalloc.start()
+    for f in formulas:
+        operation(f)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(name, "|", round(len(formulas) / elapsed), "formulas/s |", round(peak / 1024), "KiB peak")
+
+# the benchmarks are run only when the file is executed as a script, so that the processes of the parallel
+# truth table (which import the main module when they are spawned) do not run them again
+if __name__ == "__main__":
+    ##############################################
+    # SAT solver vs recursive satisfied()
+    ##############################################
+
+    # the negation of a random 3-CNF formula with ~4.26 clauses per variable (the hardest ratio) is a tautology
+    # iff the formula is unsatisfiable
+    print("variables | recursive [s] | sat [s] | tautology")
+    rng = Random(0)
+    for n in [6, 8, 10, 12]:
+        formula = Not(random_3cnf(n, int(4.26 * n), rng))
+        expected, recursive_time = measure(Formula.tautology, formula, method="recursive")
+        result, sat_time = measure(Formula.tautology, formula, method="sat")
+        assert result == expected
+        print(n, "|", round(recursive_time, 4), "|", round(sat_time, 4), "|", result)
+    # the recursive method is hopeless here (it enumerates all 2^n valuations of the variables)
+    for n in [50, 100, 150]:
+        formula = Not(random_3cnf(n, int(4.26 * n), rng))
+        result, sat_time = measure(Formula.tautology, formula, method="sat")
+        print(n, "|", "-", "|", round(sat_time, 4), "|", result)
+    print()
+
+    ##############################################
+    # simplify_fully vs calling simplified() until the formula stops changing
+    ##############################################
+
+    seed(0)
+    formulas = [generate_formula(20) for _ in range(200)]
+    print("formulas:", sum(len(str(f)) for f in formulas), "characters")
+    loop_results, loop_time = measure(lambda: [simplify_loop(f) for f in formulas])
+    full_results, full_time = measure(lambda: [f.simplify_fully() for f in formulas])
+    print("simplified() loop [s]:", round(loop_time, 4), "| result:", sum(len(str(f)) for f in loop_results), "characters")
+    print("simplify_fully() [s]:", round(full_time, 4), "| result:", sum(len(str(f)) for f in full_results), "characters")
+    print()
+
+    ##############################################
+    # scaling of the parallel truth table
+    ##############################################
+
+    # g ∨ ¬g is a tautology, so the whole truth table (2^27 rows) has to be checked
+    rng = Random(1)
+    g = random_3cnf(27, 100, rng)
+    formula = Or(g, Not(g))
+    _, serial_time = measure(Formula.tautology, formula)
+    print("serial [s]:", round(serial_time, 4))
+    workers = 1
+    while workers <= os.cpu_count():
+        result, parallel_time = measure(Formula.tautology, formula, method="parallel", workers=workers)
+        assert result
+        print(workers, "workers [s]:", round(parallel_time, 4), "| speedup:", round(serial_time / parallel_time, 2))
+        workers *= 2
+    print()
+
+    ##############################################
+    # throughput and memory on a reproducible corpus
+    ##############################################
+
+    CORPUS_SEED = 2021
+    CORPUS_SIZE = 2000
+    corpus_path = os.path.join(tempfile.gettempdir(), "formulas-" + str(CORPUS_SEED) + ".txt")
+    FormulaGenerator(seed=CORPUS_SEED, variables=8).write(corpus_path, CORPUS_SIZE, (10, 200))
+    corpus = list(load_formulas(corpus_path))
+    valuation_rng = Random(CORPUS_SEED)
+    valuation = {"x" + str(i): valuation_rng.random() < 0.5 for i in range(8)}
+    print(CORPUS_SIZE, "formulas from", corpus_path)
+    run_suite("evaluate", corpus, lambda f: f.evaluate(valuation))
+    run_suite("simplified", corpus, lambda f: f.simplified())
+    run_suite("tautology", corpus, Formula.tautology)
+    run_suite("__str__", corpus, str)
+    print()
@@ -1,26 +1,585 @@
-from random import choice, randrange
+from random import choice, randrange, Random
+import re
+from itertools import product
+from heapq import heapify, heappop, heappush
+from weakref import WeakKeyDictionary, ref
+from array import array
+from sys import intern
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import sqlite3
+from collections import OrderedDict
+from hashlib import blake2b
+from time import perf_counter
+import json
+
+# the maximal number of variables whose columns are packed into a single integer by Formula.counterexample
+TRUTH_TABLE_BITS = 20
+
+# the enabled Profiler (None if there is none), whose counters are updated by the methods of the Formula classes
+profiling = None
+
+# the key under which a formula with the given class and arguments is looked up in Formula.interned
+# the table maps weak references to formulas to themselves (a reference has the hash of its formula), so every formula
+# costs one weak reference and one entry of the table instead of a tuple of its arguments and a KeyedRef
+# of a WeakValueDictionary; a reference is compared with a key by the key (the comparison of a weak reference
+# with another object is left to the other object), which checks the class and the arguments of the formula
+class InternKey:
+    __slots__ = ("cls", "args", "hash")
+    
+    def __init__(self, cls, args):
+        self.cls = cls
+        self.args = args
+        # the hash computed by __init__ of the formula (TypeError if the arguments are unhashable)
+        self.hash = hash((cls.__name__,) + args)
+    
+    def __hash__(self):
+        return self.hash
+    
+    def __eq__(self, reference):
+        formula = reference()
+        return type(formula) is self.cls and tuple(getattr(formula, name, None) for name in self.cls.__slots__) == self.args
+
+# the callback of the references in Formula.interned: the formula is gone, so its entry is removed
+def forget(reference):
+    Formula.interned.pop(reference, None)
 
 class Formula:
+    # formulas are hash-consed: constructing a formula equal to an already existing one returns the existing object
+    # (the arguments are validated by __init__ anyway), so identical subformulas are shared
+    # and two formulas are equal iff they are the same object
+    # (see InternKey for the table of the existing formulas)
+    interned = {}
+    # nodes have no __dict__ to save memory ("compiled" caches the functions returned by compile)
+    __slots__ = ("hash", "compiled", "__weakref__")
+    
+    def __new__(cls, *args, **kwargs):
+        if kwargs:
+            # the parameters of __init__ of every kind of formula are named like its slots
+            names = cls.__slots__[len(args):]
+            if set(kwargs) != set(names):
+                # missing, repeated or unknown arguments are rejected by __init__
+                return object.__new__(cls)
+            args += tuple(kwargs[name] for name in names)
+        try:
+            key = InternKey(cls, args)
+        except TypeError:
+            # unhashable arguments are rejected by __init__
+            return object.__new__(cls)
+        reference = Formula.interned.get(key)
+        formula = None if reference is None else reference()
+        if formula is None:
+            formula = object.__new__(cls)
+            # the reference takes the hash of the formula when it is put in the table
+            formula.hash = key.hash
+            reference = ref(formula, forget)
+            Formula.interned[reference] = reference
+        return formula
+    
+    # a new formula which is not put in the table of interned formulas, so it is equal only to itself
+    # and does not share its subformulas with equal formulas (see FormulaGenerator)
+    @classmethod
+    def uninterned(cls, *args):
+        formula = object.__new__(cls)
+        formula.__init__(*args)
+        return formula
+    
+    # the hash is computed once from the hashes of subformulas
+    def __hash__(self):
+        return self.hash
+    
+    def __eq__(self, other):
+        return self is other
+    
     def __add__(self, other):
         return Or(self, other)
     def __mul__(self, other):
         return And(self, other)
+    # assumption: "variables" is a dictionary
+    # the return value is True or False
+    # the formula is evaluated by the recursive evaluate_recursively methods, which are the fastest way for formulas
+    # of ordinary depth; a formula deeper than the recursion limit (or any formula while a profiler counts
+    # the evaluated nodes) is traversed with an explicit stack instead
+    # (the stack contains the formulas whose first subformula is being evaluated
+    # or whose second subformula is being evaluated paired with the value of the first one)
+    def evaluate(self, variables):
+        profiler = profiling
+        if profiler is None:
+            try:
+                return self.evaluate_recursively(variables)
+            except RecursionError:
+                pass
+        stack = []
+        f = self
+        while True:
+            # go down to the leftmost leaf
+            while not isinstance(f, Variable) and not isinstance(f, Constant):
+                # (the leaves are counted by their own evaluate methods)
+                if profiler is not None:
+                    profiler.count(profiler.evaluations, type(f).__name__)
+                if isinstance(f, Not):
+                    stack.append((f, None))
+                    f = f.sub
+                else:
+                    stack.append((f, None))
+                    f = f.sub1
+            value = f.evaluate(variables)
+            # go up until a formula whose second subformula has to be evaluated is found
+            while stack:
+                g, first = stack.pop()
+                if isinstance(g, Not):
+                    value = not value
+                elif first is not None:
+                    if isinstance(g, Iff):
+                        value = first == value
+                # the value of the first subformula is known
+                # implication is true if sub1 is false or sub1 and sub2 are true
+                elif isinstance(g, Or) and value:
+                    value = True
+                elif (isinstance(g, And) or isinstance(g, Implies)) and not value:
+                    value = isinstance(g, Implies)
+                else:
+                    stack.append((g, value))
+                    f = g.sub2
+                    break
+            else:
+                return value
+    
+    # "masks" maps variable names to their columns of the truth table packed into integers
+    # "full" is the column consisting of ones only
+    # the value of a subformula is dropped after its last use (see TransientValues), since the columns are large
+    def truth_table(self, masks, full):
+        if profiling is not None:
+            # every bit of "full" is a row of the table
+            profiling.assignments += full.bit_length()
+        values = TransientValues(self)
+        stack = [self]
+        while stack:
+            f = stack[-1]
+            if f in values:
+                stack.pop()
+                continue
+            if isinstance(f, Variable):
+                values[f] = masks[f.name]
+            elif isinstance(f, Constant):
+                values[f] = full if f.value else 0
+            elif isinstance(f, Not):
+                if f.sub not in values:
+                    stack.append(f.sub)
+                    continue
+                values[f] = full ^ values.take(f.sub)
+            else:
+                if f.sub1 not in values or f.sub2 not in values:
+                    stack.append(f.sub2)
+                    stack.append(f.sub1)
+                    continue
+                a, b = values.take(f.sub1), values.take(f.sub2)
+                if isinstance(f, Or):
+                    values[f] = a | b
+                elif isinstance(f, And):
+                    values[f] = a & b
+                elif isinstance(f, Implies):
+                    values[f] = (full ^ a) | b
+                else:
+                    values[f] = full ^ (a ^ b)
+            stack.pop()
+        return values[self]
+    
+    # subformulas which are not constants, variables or negations are put in parentheses
+    # (negations only if they are negated)
+    # the parts of the result are collected in a list and joined once
+    def __str__(self):
+        parts = []
+        stack = [self]
+        while stack:
+            f = stack.pop()
+            if isinstance(f, str):
+                parts.append(f)
+            elif isinstance(f, Variable) or isinstance(f, Constant):
+                parts.append(str(f))
+            elif isinstance(f, Not):
+                parts.append("¬")
+                if isinstance(f.sub, Constant) or isinstance(f.sub, Variable):
+                    stack.append(f.sub)
+                else:
+                    stack += [")", f.sub, "("]
+            else:
+                for sub in (f.sub2, f.symbol, f.sub1):
+                    if isinstance(sub, str) or isinstance(sub, Constant) or isinstance(sub, Variable) or isinstance(sub, Not):
+                        stack.append(sub)
+                    else:
+                        stack += [")", sub, "("]
+        return "".join(parts)
+    
+    # simplify the formula
+    # the rules are given by the simplification methods which return either the simplified formula
+    # or a pair (function, subformulas) meaning that the result is the function applied to the simplified subformulas
+    # the simplification of subformulas is done with an explicit stack
     def simplified(self):
+        # every element of the stack is [function, subformulas, their simplified versions]
+        stack = []
+        step = self.simplification()
+        while True:
+            if isinstance(step, Formula):
+                result = step
+                # pass the result up until a formula with subformulas left to simplify is found
+                while stack:
+                    stack[-1][2].append(result)
+                    function, subs, results = stack[-1]
+                    if len(results) < len(subs):
+                        break
+                    stack.pop()
+                    result = function(*results)
+                else:
+                    return result
+            else:
+                stack.append([step[0], step[1], []])
+            function, subs, results = stack[-1]
+            step = subs[len(results)].simplification()
+    
+    def simplification(self):
         return self
     
+    # return a Python function equivalent to the formula which takes the values of variables as positional arguments
+    # in the order given by "order" (by default the order of Formula.variable_names); the order is stored in its "variables" attribute
+    # the function is generated as source code, so evaluating it does not go through the evaluate methods
+    # (and it does not check that the arguments are booleans); "or" and "and" keep the short-circuit semantics
+    # except for the subformulas which are computed in advance (see compile_formula)
+    # functions are cached, so compiling the formula again with the same order is free
+    def compile(self, order=None):
+        order = tuple(self.variable_names() if order is None else order)
+        functions = getattr(self, "compiled", None)
+        if functions is None:
+            functions = self.compiled = {}
+        if order not in functions:
+            functions[order] = compile_formula(self, order)
+        return functions[order]
+    
+    # evaluate the formula for many valuations at once
+    # "columns" maps names of variables to NumPy arrays of booleans (the i-th valuation consists of the i-th elements)
+    # or it is a 2-D array whose columns are the values of variables listed in "order"
+    # the result is an array of booleans computed in a single pass over the formula
+    def evaluate_batch(self, columns, order=None):
+        import numpy
+        if order is not None:
+            array = numpy.asarray(columns)
+            if array.ndim != 2 or array.shape[1] != len(order):
+                raise ValueError("Expected a 2-D array with " + str(len(order)) + " columns")
+            columns = {name: array[:, i] for i, name in enumerate(order)}
+        shape = ()
+        for column in columns.values():
+            shape = numpy.shape(column)
+            break
+        
+        values = TransientValues(self)
+        stack = [self]
+        while stack:
+            f = stack[-1]
+            if f in values:
+                stack.pop()
+                continue
+            if isinstance(f, Variable):
+                if f.name not in columns:
+                    raise UnassignedVariable("Unassigned variable: " + f.name)
+                column = numpy.asarray(columns[f.name])
+                if column.dtype != bool:
+                    raise TypeError("The value of a variable has to be True or False")
+                values[f] = column
+            elif isinstance(f, Constant):
+                values[f] = numpy.full(shape, f.value)
+            else:
+                subs = [f.sub] if isinstance(f, Not) else [f.sub1, f.sub2]
+                pending = [sub for sub in subs if sub not in values]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                if isinstance(f, Not):
+                    values[f] = numpy.logical_not(values.take(f.sub))
+                elif isinstance(f, Or):
+                    values[f] = numpy.logical_or(values.take(f.sub1), values.take(f.sub2))
+                elif isinstance(f, And):
+                    values[f] = numpy.logical_and(values.take(f.sub1), values.take(f.sub2))
+                elif isinstance(f, Implies):
+                    values[f] = numpy.logical_or(numpy.logical_not(values.take(f.sub1)), values.take(f.sub2))
+                else:
+                    values[f] = numpy.equal(values.take(f.sub1), values.take(f.sub2))
+            stack.pop()
+        return values[self]
+    
+    # the compact representation of the formula (see PackedFormula)
+    def pack(self):
+        return PackedFormula(self)
+    
+    # the negation normal form: an equivalent formula built from variables, their negations, ∧ and ∨
+    # (or a constant); every subformula is converted once for each polarity, so the result shares subformulas
+    # and its size (counted without repetitions) is linear in the size of the formula
+    def to_nnf(self):
+        results = {}
+        # (formula, polarity): True for the formula and False for its negation
+        stack = [(self, True)]
+        while stack:
+            key = stack[-1]
+            if key in results:
+                stack.pop()
+                continue
+            f, positive = key
+            if isinstance(f, Variable):
+                results[key] = f if positive else Not(f)
+            elif isinstance(f, Constant):
+                results[key] = Constant(f.value == positive)
+            elif isinstance(f, Not):
+                if (f.sub, not positive) not in results:
+                    stack.append((f.sub, not positive))
+                    continue
+                results[key] = results[(f.sub, not positive)]
+            else:
+                if isinstance(f, Or) or isinstance(f, And):
+                    needed = [(f.sub1, positive), (f.sub2, positive)]
+                elif isinstance(f, Implies):
+                    needed = [(f.sub1, not positive), (f.sub2, positive)]
+                else:
+                    needed = [(f.sub1, True), (f.sub2, True), (f.sub1, False), (f.sub2, False)]
+                pending = [k for k in needed if k not in results]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                subs = [results[k] for k in needed]
+                if isinstance(f, Or):
+                    # ¬(P ∨ Q) ≡ ¬P ∧ ¬Q
+                    results[key] = Or(subs[0], subs[1]) if positive else And(subs[0], subs[1])
+                elif isinstance(f, And):
+                    # ¬(P ∧ Q) ≡ ¬P ∨ ¬Q
+                    results[key] = And(subs[0], subs[1]) if positive else Or(subs[0], subs[1])
+                elif isinstance(f, Implies):
+                    # P ⟹ Q ≡ ¬P ∨ Q, ¬(P ⟹ Q) ≡ P ∧ ¬Q
+                    results[key] = Or(subs[0], subs[1]) if positive else And(subs[0], subs[1])
+                elif positive:
+                    # P ⇔ Q ≡ (P ∧ Q) ∨ (¬P ∧ ¬Q)
+                    results[key] = Or(And(subs[0], subs[1]), And(subs[2], subs[3]))
+                else:
+                    # ¬(P ⇔ Q) ≡ (P ∧ ¬Q) ∨ (¬P ∧ Q)
+                    results[key] = Or(And(subs[0], subs[3]), And(subs[2], subs[1]))
+            stack.pop()
+        # simplify_fully removes the constants and keeps the formula in the negation normal form
+        return results[(self, True)].simplify_fully()
+    
+    # the conjunctive normal form as a NormalForm (a list of clauses)
+    # method="tseitin" gives clauses which are satisfiable iff the formula is (they use additional variables),
+    # their number is linear in the size of the formula
+    # method="equivalent" gives an equivalent CNF obtained by distributing ∨ over ∧ in the negation normal form;
+    # since it can be exponentially large, NormalFormTooLarge is raised when it exceeds max_clauses clauses
+    def to_cnf(self, method="tseitin", max_clauses=100000):
+        if method == "tseitin":
+            clauses, numbers = tseitin(self)
+            names = [None] * len(numbers)
+            for key, n in numbers.items():
+                if isinstance(key, str):
+                    names[n - 1] = key
+            return NormalForm("cnf", clauses, names)
+        if method != "equivalent":
+            raise ValueError("Unknown method: " + str(method))
+        return distributed(self.to_nnf(), self.variable_names(), True, max_clauses)
+    
+    # the disjunctive normal form as a NormalForm (a list of terms)
+    # NormalFormTooLarge is raised when it exceeds max_terms terms
+    def to_dnf(self, max_terms=100000):
+        return distributed(self.to_nnf(), self.variable_names(), False, max_terms)
+    
+    # simplify the formula as much as possible in a single bottom-up traversal
+    # (simplified() applies the rules only one level deep, so it has to be called until the formula stops changing)
+    # apart from the rules of simplified() it flattens nested conjunctions and disjunctions, removes repeated operands
+    # and applies the complement (P ∧ ¬P ≡ ⊥, P ∨ ¬P ≡ ⊤) and absorption (P ∧ (P ∨ Q) ≡ P, P ∨ (P ∧ Q) ≡ P) rules
+    # every subformula is simplified once, even if it occurs many times
+    # the variables in "valuation" are replaced by their values before simplifying
+    def simplify_fully(self, valuation={}):
+        results = {}
+        # operands of the simplified conjunctions and disjunctions
+        operands = {}
+        # operands of the maximal nested conjunctions (disjunctions) of the original formula
+        clusters = {}
+        # how many subformulas of a formula have already been simplified
+        progress = {}
+        stack = [self]
+        while stack:
+            f = stack[-1]
+            if f in results:
+                stack.pop()
+                continue
+            if isinstance(f, Or) or isinstance(f, And):
+                if f not in clusters:
+                    clusters[f] = junction_operands(f)
+                subs = clusters[f]
+            elif isinstance(f, Implies) or isinstance(f, Iff):
+                subs = [f.sub1, f.sub2]
+            elif isinstance(f, Not):
+                subs = [f.sub]
+            else:
+                subs = []
+            # the subformulas are simplified one by one, because some of them can make the other ones irrelevant
+            # (⊥ ∧ P ≡ ⊥, ⊤ ∨ P ≡ ⊤, ⊥ ⟹ P ≡ ⊤)
+            pending = None
+            shortcut = None
+            i = progress.get(f, 0)
+            for sub in subs[i:]:
+                if sub not in results:
+                    pending = sub
+                    break
+                i += 1
+                if isinstance(results[sub], Constant):
+                    if isinstance(f, Or) or isinstance(f, And):
+                        if results[sub].value == isinstance(f, Or):
+                            shortcut = results[sub]
+                            break
+                    elif isinstance(f, Implies) and sub is f.sub1 and not results[sub].value:
+                        shortcut = Constant(True)
+                        break
+            progress[f] = i
+            if shortcut is not None:
+                results[f] = shortcut
+                stack.pop()
+                continue
+            if pending is not None:
+                stack.append(pending)
+                continue
+            subs = [results[sub] for sub in subs]
+            if isinstance(f, Or) or isinstance(f, And):
+                results[f] = simplified_junction(type(f), subs, operands)
+            elif isinstance(f, Implies):
+                results[f] = simplified_implication(subs[0], subs[1])
+            elif isinstance(f, Iff):
+                results[f] = simplified_equivalence(subs[0], subs[1])
+            elif isinstance(f, Not):
+                results[f] = negation(subs[0])
+            elif isinstance(f, Variable) and f.name in valuation:
+                results[f] = Constant(valuation[f.name])
+            else:
+                results[f] = f
+            stack.pop()
+        return results[self]
+    
+    # generate the valuations of "variables" (by default the variables of the formula) for which the formula is true
+    # the valuations are found by splitting on variables and simplifying the formula after every split,
+    # so a ⊥ prunes the whole subtree and a ⊤ yields all the valuations of the remaining variables
+    def models(self, variables=None):
+        names = self.variable_names() if variables is None else list(variables)
+        missing = set(self.variable_names()) - set(names)
+        if missing:
+            raise ValueError("The formula depends on variables which are not listed: " + ", ".join(sorted(missing)))
+        # (formula, valuation of the variables which have been split on)
+        stack = [(self.simplify_fully(), {})]
+        while stack:
+            f, valuation = stack.pop()
+            if isinstance(f, Constant):
+                if f.value:
+                    free = [name for name in names if name not in valuation]
+                    for values in product([False, True], repeat=len(free)):
+                        model = dict(valuation)
+                        model.update(zip(free, values))
+                        yield model
+                continue
+            name = f.variable_names()[0]
+            for value in (True, False):
+                stack.append((f.simplify_fully({name: value}), dict(valuation, **{name: value})))
+    
+    # the number of valuations of "variables" (by default the variables of the formula) for which the formula is true
+    # conjunctions and disjunctions whose operands have disjoint sets of variables are counted as products,
+    # otherwise the counter splits on the most frequent variable; the counts of subformulas are cached
+    def count_models(self, variables=None):
+        names = set(self.variable_names() if variables is None else variables)
+        f = self.simplify_fully()
+        used = f.variable_names()
+        if not set(used) <= names:
+            raise ValueError("The formula depends on variables which are not listed: " + ", ".join(sorted(set(used) - names)))
+        return count_models(f, {}, {}) << (len(names) - len(used))
+    
+    
+    # read a formula in the format produced by __str__
+    # ¬ binds the strongest, then ∧, ∨, ⟹ and ⇔; ⟹ is right-associative and the other operators are left-associative
+    # (str never relies on this, because it puts all compound operands of binary operators in parentheses)
+    # the parser uses explicit stacks of operands and operators, so it works in linear time even for deep formulas
     @staticmethod
-    def tautology(formula):
-        variables = []
+    def parse(text):
+        operands = []
+        operators = []
         
-        # find names of all variables occuring in the formula
-        def find_variables(formula):
-            if isinstance(formula, Variable):
-                variables.append(str(formula))
-            elif isinstance(formula, Or) or isinstance(formula, And) or isinstance(formula, Implies) or isinstance(formula, Iff):
-                find_variables(formula.sub1)
-                find_variables(formula.sub2)
-            elif isinstance(formula, Not):
-                find_variables(formula.sub)
+        def reduce():
+            operator = operators.pop()
+            if operator == "¬":
+                operands.append(Not(operands.pop()))
+            else:
+                sub2 = operands.pop()
+                sub1 = operands.pop()
+                operands.append(OPERATORS[operator][0](sub1, sub2))
+        
+        expect_operand = True
+        for match in TOKEN.finditer(text):
+            token = match.group()
+            if token[0] == " ":
+                continue
+            if expect_operand:
+                if token == "(" or token == "¬":
+                    operators.append(token)
+                elif token == "⊤" or token == "⊥":
+                    operands.append(Constant(token == "⊤"))
+                    expect_operand = False
+                elif token in OPERATORS or token == ")":
+                    raise ParseError("Expected a formula at position " + str(match.start()) + ", found " + token)
+                else:
+                    operands.append(Variable(token))
+                    expect_operand = False
+            elif token == ")":
+                while operators and operators[-1] != "(":
+                    reduce()
+                if not operators:
+                    raise ParseError("Unmatched ) at position " + str(match.start()))
+                operators.pop()
+            elif token in OPERATORS:
+                precedence, right = OPERATORS[token][1:]
+                while operators and operators[-1] != "(":
+                    top = 5 if operators[-1] == "¬" else OPERATORS[operators[-1]][1]
+                    if top < precedence or (top == precedence and right):
+                        break
+                    reduce()
+                operators.append(token)
+                expect_operand = True
+            else:
+                raise ParseError("Expected an operator at position " + str(match.start()) + ", found " + token)
+        if expect_operand:
+            raise ParseError("Unexpected end of the formula")
+        while operators:
+            if operators[-1] == "(":
+                raise ParseError("Unmatched (")
+            reduce()
+        return operands[0]
+    
+    # names of all variables occuring in the formula, in order of first occurence and without repetitions
+    def variable_names(self):
+        names = {}
+        visited = set()
+        stack = [self]
+        while stack:
+            f = stack.pop()
+            if isinstance(f, Variable):
+                names[f.name] = None
+            elif f not in visited:
+                visited.add(f)
+                if isinstance(f, Or) or isinstance(f, And) or isinstance(f, Implies) or isinstance(f, Iff):
+                    stack.append(f.sub2)
+                    stack.append(f.sub1)
+                elif isinstance(f, Not):
+                    stack.append(f.sub)
+        return list(names)
+    
+    # method="truth_table" evaluates the whole truth table at once (see Formula.counterexample)
+    # method="sat" looks for a model of the negated formula with a SAT solver (suitable for formulas with many variables)
+    # method="bdd" checks if the BDD of the formula is the ⊤ node
+    # method="parallel" computes the truth table in many processes
+    # method="recursive" checks the valuations one by one
+    @staticmethod
+    def tautology(formula, method="truth_table", workers=None, split=None):
+        if method != "recursive":
+            return Formula.counterexample(formula, method, workers, split) is None
         
         valuation = {}
         
@@ -34,206 +593,272 @@ class Formula:
             valuation[variables[0]] = True
             return satisfied(variables[1:])
         
-        find_variables(formula)
-        return satisfied(variables)
+        return satisfied(formula.variable_names())
+    
+    # return a valuation for which the formula is false or None if the formula is a tautology
+    # the truth table is computed bit-parallel: the column of every variable is packed into one integer
+    # (the i-th bit is the value of the variable in the i-th row) and the columns are combined with bitwise operators,
+    # so a whole table is computed in a single pass over the formula
+    # if there are more than TRUTH_TABLE_BITS variables, the table is split into chunks by fixing the remaining ones
+    # with method="sat" the counterexample is a model of ¬formula found by SATSolver
+    # with method="bdd" it is read from the BDD of the formula built by the shared manager SHARED_BDD
+    # with method="parallel" the truth table is split into shards checked by "workers" processes
+    # (see parallel_counterexample)
+    @staticmethod
+    def counterexample(formula, method="truth_table", workers=None, split=None):
+        if method == "sat":
+            return Formula.find_model(formula, negated=True)
+        if method == "bdd":
+            return SHARED_BDD.counterexample(formula)
+        if method == "parallel":
+            return parallel_counterexample(formula, workers, split)
+        if method != "truth_table":
+            raise ValueError("Unknown method: " + str(method))
+        return table_counterexample(formula)
+    
+    # return a valuation for which the formula (or its negation if negated=True) is true or None if there is no such valuation
+    @staticmethod
+    def find_model(formula, negated=False):
+        clauses, numbers = tseitin(formula, negated)
+        solver = SATSolver(len(numbers))
+        for clause in clauses:
+            solver.add_clause(clause)
+        model = solver.solve()
+        if model is None:
+            return None
+        return {name: model[n] for name, n in numbers.items() if isinstance(name, str)}
+    
+    @staticmethod
+    def satisfiable(formula):
+        return Formula.find_model(formula) is not None
+    
+    # check if the formulas are true for exactly the same valuations
+    # by default the BDDs of both formulas are built by SHARED_BDD and compared
+    @staticmethod
+    def equivalent(formula1, formula2, method="bdd"):
+        if method == "bdd":
+            return SHARED_BDD.equivalent(formula1, formula2)
+        return Formula.tautology(Iff(formula1, formula2), method)
         
 class Or(Formula):
+    __slots__ = ("sub1", "sub2")
+    symbol = " ∨ "
+    
     # "sub" stands for "subformula"
     def __init__(self, sub1, sub2):
         if isinstance(sub1, Formula) and isinstance(sub2, Formula):
             self.sub1 = sub1
             self.sub2 = sub2
+            self.hash = hash(("Or", sub1, sub2))
         else:
             raise TypeError("Subformulas have to be instances of Formula")
-        
-    # assumption: "variables" is a dictionary
-    # the return value is True or False
-    def evaluate(self, variables):
-        if self.sub1.evaluate(variables):
-            return True
-        return self.sub2.evaluate(variables)
     
-    def __str__(self):
-        sub1 = str(self.sub1) if isinstance(self.sub1, Constant) or isinstance(self.sub1, Variable) or isinstance(self.sub1, Not) else "(" + str(self.sub1) + ")"
-        sub2 = str(self.sub2) if isinstance(self.sub2, Constant) or isinstance(self.sub2, Variable) or isinstance(self.sub2, Not) else "(" + str(self.sub2) + ")"
-        return sub1 + " ∨ " + sub2
+    def evaluate_recursively(self, variables):
+        return self.sub1.evaluate_recursively(variables) or self.sub2.evaluate_recursively(variables)
     
-    # simplify the formula
-    def simplified(self):
+    def __reduce__(self):
+        return (Or, (self.sub1, self.sub2))
+        
+    def simplification(self):
         # P ∨ P ≡ P
-        if str(self.sub1) == str(self.sub2):
-            return self.sub1
+        if self.sub1 is self.sub2:
+            return applied("P ∨ P", self.sub1)
         if isinstance(self.sub1, Constant):
             # ⊤ ∨ P ≡ ⊤ 
             if self.sub1.value == True:
-                return Constant(True)
+                return applied("⊤ ∨ P", Constant(True))
             # ⊥ ∨ P ≡ P
-            return self.sub2.simplified()
+            return applied("⊥ ∨ P", (same, [self.sub2]))
         if isinstance(self.sub2, Constant):
             # P ∨ ⊤ ≡ ⊤ 
             if self.sub2.value == True:
-                return Constant(True)
+                return applied("P ∨ ⊤", Constant(True))
             # P ∨ ⊥ ≡ P
-            return self.sub1.simplified()
-        return Or(self.sub1.simplified(), self.sub2.simplified())
+            return applied("P ∨ ⊥", (same, [self.sub1]))
+        return (Or, [self.sub1, self.sub2])
 
 class And(Formula):
+    __slots__ = ("sub1", "sub2")
+    symbol = " ∧ "
+    
     def __init__(self, sub1, sub2):
         if isinstance(sub1, Formula) and isinstance(sub2, Formula):
             self.sub1 = sub1
             self.sub2 = sub2
+            self.hash = hash(("And", sub1, sub2))
         else:
             raise TypeError("Subformulas have to be instances of Formula")
-        
-    def evaluate(self, variables):
-        if not self.sub1.evaluate(variables):
-            return False
-        return self.sub2.evaluate(variables)
     
-    def __str__(self):
-        sub1 = str(self.sub1) if isinstance(self.sub1, Constant) or isinstance(self.sub1, Variable) or isinstance(self.sub1, Not) else "(" + str(self.sub1) + ")"
-        sub2 = str(self.sub2) if isinstance(self.sub2, Constant) or isinstance(self.sub2, Variable) or isinstance(self.sub2, Not) else "(" + str(self.sub2) + ")"
-        return sub1 + " ∧ " + sub2
+    def evaluate_recursively(self, variables):
+        return self.sub1.evaluate_recursively(variables) and self.sub2.evaluate_recursively(variables)
     
-    def simplified(self):
+    def __reduce__(self):
+        return (And, (self.sub1, self.sub2))
+        
+    def simplification(self):
         # P ∧ P ≡ P
-        if str(self.sub1) == str(self.sub2):
-            return self.sub1
+        if self.sub1 is self.sub2:
+            return applied("P ∧ P", self.sub1)
         if isinstance(self.sub1, Constant):
             # ⊥ ∧ P ≡ ⊥ 
             if self.sub1.value == False:
-                return Constant(False)
+                return applied("⊥ ∧ P", Constant(False))
             # ⊤ ∧ P ≡ P
-            return self.sub2.simplified()
+            return applied("⊤ ∧ P", (same, [self.sub2]))
         if isinstance(self.sub2, Constant):
             # P ∧ ⊥ ≡ ⊥ 
             if self.sub2.value == False:
-                return Constant(False)
+                return applied("P ∧ ⊥", Constant(False))
             # P ∧ ⊤ ≡ P
-            return self.sub1.simplified()
-        return And(self.sub1.simplified(), self.sub2.simplified())
+            return applied("P ∧ ⊤", (same, [self.sub1]))
+        return (And, [self.sub1, self.sub2])
     
 class Implies(Formula):
+    __slots__ = ("sub1", "sub2")
+    symbol = " ⟹ "
+    
     def __init__(self, sub1, sub2):
         if isinstance(sub1, Formula) and isinstance(sub2, Formula):
             self.sub1 = sub1
             self.sub2 = sub2
+            self.hash = hash(("Implies", sub1, sub2))
         else:
             raise TypeError("Subformulas have to be instances of Formula")
-        
-    # implication is true if sub1 is false or sub1 and sub2 are true
-    def evaluate(self, variables):
-        if not self.sub1.evaluate(variables):
-            return True
-        return self.sub2.evaluate(variables)
     
-    def __str__(self):
-        sub1 = str(self.sub1) if isinstance(self.sub1, Constant) or isinstance(self.sub1, Variable) or isinstance(self.sub1, Not) else "(" + str(self.sub1) + ")"
-        sub2 = str(self.sub2) if isinstance(self.sub2, Constant) or isinstance(self.sub2, Variable) or isinstance(self.sub2, Not) else "(" + str(self.sub2) + ")"
-        return sub1 + " ⟹ " + sub2
+    def evaluate_recursively(self, variables):
+        return not self.sub1.evaluate_recursively(variables) or self.sub2.evaluate_recursively(variables)
     
-    def simplified(self):
+    def __reduce__(self):
+        return (Implies, (self.sub1, self.sub2))
+        
+    def simplification(self):
         # P ⟹ P ≡ ⊤ 
-        if str(self.sub1) == str(self.sub2):
-            return Constant(True)
+        if self.sub1 is self.sub2:
+            return applied("P ⟹ P", Constant(True))
         if isinstance(self.sub1, Constant):
             # ⊥ ⟹ P ≡ ⊤
             if self.sub1.value == False:
-                return Constant(True)
+                return applied("⊥ ⟹ P", Constant(True))
             # ⊤ ⟹ P ≡ P
-            return self.sub2.simplified()
+            return applied("⊤ ⟹ P", (same, [self.sub2]))
         if isinstance(self.sub2, Constant):
             # P ⟹ ⊥ ≡ ¬P
             if self.sub2.value == False:
-                return Not(self.sub1.simplified())
+                return applied("P ⟹ ⊥", (Not, [self.sub1]))
             # P ⟹ ⊤ ≡ ⊤
-            return Constant(True)
-        return Implies(self.sub1.simplified(), self.sub2.simplified())
+            return applied("P ⟹ ⊤", Constant(True))
+        return (Implies, [self.sub1, self.sub2])
     
 class Iff(Formula):
+    __slots__ = ("sub1", "sub2")
+    symbol = " ⇔ "
+    
     def __init__(self, sub1, sub2):
         if isinstance(sub1, Formula) and isinstance(sub2, Formula):
             self.sub1 = sub1
             self.sub2 = sub2
+            self.hash = hash(("Iff", sub1, sub2))
         else:
             raise TypeError("Subformulas have to be instances of Formula")
-        
-    def evaluate(self, variables):
-        return self.sub1.evaluate(variables) == self.sub2.evaluate(variables)
     
-    def __str__(self):
-        sub1 = str(self.sub1) if isinstance(self.sub1, Constant) or isinstance(self.sub1, Variable) or isinstance(self.sub1, Not) else "(" + str(self.sub1) + ")"
-        sub2 = str(self.sub2) if isinstance(self.sub2, Constant) or isinstance(self.sub2, Variable) or isinstance(self.sub2, Not) else "(" + str(self.sub2) + ")"
-        return sub1 + " ⇔ " + sub2
+    def evaluate_recursively(self, variables):
+        return self.sub1.evaluate_recursively(variables) == self.sub2.evaluate_recursively(variables)
     
-    def simplified(self):
+    def __reduce__(self):
+        return (Iff, (self.sub1, self.sub2))
+        
+    def simplification(self):
         # P ⇔ P ≡ ⊤ 
-        if str(self.sub1) == str(self.sub2):
-            return Constant(True)
+        if self.sub1 is self.sub2:
+            return applied("P ⇔ P", Constant(True))
         if isinstance(self.sub1, Constant):
             # ⊥ ⇔ P ≡ ¬P
             if self.sub1.value == False:
-                return Not(self.sub2.simplified())
+                return applied("⊥ ⇔ P", (Not, [self.sub2]))
             # ⊤ ⇔ P ≡ P
-            return self.sub2.simplified()
+            return applied("⊤ ⇔ P", (same, [self.sub2]))
         if isinstance(self.sub2, Constant):
             # P ⇔ ⊥  ≡ ¬P
             if self.sub2.value == False:
-                return Not(self.sub1.simplified())
+                return applied("P ⇔ ⊥", (Not, [self.sub1]))
             # P ⇔ ⊤ ≡ P
-            return self.sub1.simplified()
-        return Iff(self.sub1.simplified(), self.sub2.simplified())
+            return applied("P ⇔ ⊤", (same, [self.sub1]))
+        return (Iff, [self.sub1, self.sub2])
 
 class Not(Formula):
+    __slots__ = ("sub",)
+    
     def __init__(self, sub):
         if isinstance(sub, Formula):
             self.sub = sub
+            self.hash = hash(("Not", sub))
         else:
             raise TypeError("Subformulas have to be instances of Formula")
-        
-    def evaluate(self, variables):
-        return not self.sub.evaluate(variables)
     
-    def __str__(self):
-        sub = str(self.sub) if isinstance(self.sub, Constant) or isinstance(self.sub, Variable) else "(" + str(self.sub) + ")"
-        return "¬" + sub
+    def evaluate_recursively(self, variables):
+        return not self.sub.evaluate_recursively(variables)
     
-    def simplified(self):
+    def __reduce__(self):
+        return (Not, (self.sub,))
+        
+    def simplification(self):
         if isinstance(self.sub, Constant):
             # ¬⊥ ≡ ⊤
             if self.sub.value == False:
-                return Constant(True)
+                return applied("¬⊥", Constant(True))
             # ¬⊤ ≡ ⊥ 
-            return Constant(False)
+            return applied("¬⊤", Constant(False))
         # ¬(¬P) ≡ P
         if isinstance(self.sub, Not):
-            return self.sub.sub.simplified()
-        return Not(self.sub.simplified())
+            return applied("¬(¬P)", (same, [self.sub.sub]))
+        return (Not, [self.sub])
     
 class Constant(Formula):
+    __slots__ = ("value",)
+    
     def __init__(self, value):
         if isinstance(value, bool):
             self.value = value
+            self.hash = hash(("Constant", value))
         else:
             raise TypeError("The value of Constant has to be True or False")
+    
+    def __reduce__(self):
+        return (Constant, (self.value,))
         
     def evaluate(self, variables):
+        if profiling is not None:
+            profiling.count(profiling.evaluations, "Constant")
+        return self.value
+    
+    def evaluate_recursively(self, variables):
         return self.value
     
     def __str__(self):
         return "⊤" if self.value == True else "⊥"
     
 class Variable(Formula):
+    __slots__ = ("name",)
+    
     def __init__(self, name):
         if isinstance(name, str):
             for c in [" ", "(", ")", "∨", "∧", "⟹", "⇔", "¬", "⊥", "⊤"]:
                 if c in name:
                     raise InvalidVariableName(name + " is an invalid variable name")
             self.name = name
+            self.hash = hash(("Variable", name))
         else:
             raise TypeError("The name of a variable has to be a string")
+    
+    def __reduce__(self):
+        return (Variable, (self.name,))
         
     def evaluate(self, variables):
+        if profiling is not None:
+            profiling.count(profiling.evaluations, "Variable")
+        return self.evaluate_recursively(variables)
+    
+    def evaluate_recursively(self, variables):
         if self.name not in variables:
             raise UnassignedVariable("Unassigned variable: " + self.name)
         if not isinstance(variables[self.name], bool):
@@ -249,6 +874,1446 @@ class UnassignedVariable(Exception):
 class InvalidVariableName(Exception):
     pass
 
+class ParseError(Exception):
+    pass
+
+class NormalFormTooLarge(Exception):
+    pass
+
+# tokens of the textual format: spaces, operators, parentheses, constants and names of variables
+TOKEN = re.compile(r" +|[()∨∧⟹⇔¬⊤⊥]|[^ ()∨∧⟹⇔¬⊤⊥]+")
+
+# binary operators: symbol -> (class, precedence, is right-associative)
+OPERATORS = {
+    "⇔": (Iff, 1, False),
+    "⟹": (Implies, 2, True),
+    "∨": (Or, 3, False),
+    "∧": (And, 4, False)
+}
+
+# read formulas from a file with one formula per line (empty lines are skipped)
+# the formulas are parsed lazily, so the file does not have to fit in memory
+def load_formulas(path):
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            line = line.rstrip("\r\n")
+            if line.strip(" "):
+                try:
+                    yield Formula.parse(line)
+                except ParseError as e:
+                    raise ParseError("Line " + str(number) + ": " + str(e))
+
+# write formulas to a file in the format read by load_formulas
+def save_formulas(path, formulas):
+    with open(path, "w", encoding="utf-8") as file:
+        for formula in formulas:
+            file.write(str(formula) + "\n")
+
+# a compact representation of a formula: a sequence of instructions stored in arrays of integers
+# the i-th instruction has the code opcodes[i] and operands first[i] and second[i], which are indices of earlier instructions
+# (or the index of the name in "names" for a variable), so a subformula occuring many times is stored once
+# the last instruction is the whole formula
+class PackedFormula:
+    __slots__ = ("opcodes", "first", "second", "names")
+    
+    FALSE, TRUE, VARIABLE, NOT, OR, AND, IMPLIES, IFF = range(8)
+    binary = {Or: OR, And: AND, Implies: IMPLIES, Iff: IFF}
+    
+    def __init__(self, formula=None):
+        self.opcodes = array("B")
+        self.first = array("I")
+        self.second = array("I")
+        self.names = []
+        if formula is None:
+            return
+        if not isinstance(formula, Formula):
+            raise TypeError("Only instances of Formula can be packed")
+        positions = {}
+        name_positions = {}
+        stack = [formula]
+        while stack:
+            f = stack[-1]
+            if f in positions:
+                stack.pop()
+                continue
+            if isinstance(f, Variable):
+                if f.name not in name_positions:
+                    name_positions[f.name] = len(self.names)
+                    self.names.append(intern(f.name))
+                self.add(PackedFormula.VARIABLE, name_positions[f.name])
+            elif isinstance(f, Constant):
+                self.add(PackedFormula.TRUE if f.value else PackedFormula.FALSE)
+            elif isinstance(f, Not):
+                if f.sub not in positions:
+                    stack.append(f.sub)
+                    continue
+                self.add(PackedFormula.NOT, positions[f.sub])
+            else:
+                if f.sub1 not in positions or f.sub2 not in positions:
+                    stack.append(f.sub2)
+                    stack.append(f.sub1)
+                    continue
+                self.add(PackedFormula.binary[type(f)], positions[f.sub1], positions[f.sub2])
+            positions[f] = len(self.opcodes) - 1
+            stack.pop()
+    
+    def add(self, opcode, first=0, second=0):
+        self.opcodes.append(opcode)
+        self.first.append(first)
+        self.second.append(second)
+    
+    def __len__(self):
+        return len(self.opcodes)
+    
+    def unpack(self):
+        formulas = []
+        constructors = {code: cls for cls, code in PackedFormula.binary.items()}
+        for opcode, first, second in zip(self.opcodes, self.first, self.second):
+            if opcode == PackedFormula.VARIABLE:
+                formulas.append(Variable(self.names[first]))
+            elif opcode == PackedFormula.NOT:
+                formulas.append(Not(formulas[first]))
+            elif opcode in constructors:
+                formulas.append(constructors[opcode](formulas[first], formulas[second]))
+            else:
+                formulas.append(Constant(opcode == PackedFormula.TRUE))
+        return formulas[-1]
+    
+    # the instructions are executed in order, so there is no short-circuiting
+    # and every variable of the formula has to be assigned
+    def evaluate(self, variables):
+        for name in self.names:
+            if name not in variables:
+                raise UnassignedVariable("Unassigned variable: " + name)
+            if not isinstance(variables[name], bool):
+                raise TypeError("The value of a variable has to be True or False")
+        values = []
+        for opcode, first, second in zip(self.opcodes, self.first, self.second):
+            if opcode == PackedFormula.VARIABLE:
+                values.append(variables[self.names[first]])
+            elif opcode == PackedFormula.NOT:
+                values.append(not values[first])
+            elif opcode == PackedFormula.OR:
+                values.append(values[first] or values[second])
+            elif opcode == PackedFormula.AND:
+                values.append(values[first] and values[second])
+            elif opcode == PackedFormula.IMPLIES:
+                values.append(not values[first] or values[second])
+            elif opcode == PackedFormula.IFF:
+                values.append(values[first] == values[second])
+            else:
+                values.append(opcode == PackedFormula.TRUE)
+        return values[-1]
+
+# the truth table part of Formula.counterexample
+# the variables in "fixed" have the given values, so only the rows of the table matching them are checked
+# if "stop" (an event) gets set, the search is abandoned and None is returned
+def table_counterexample(formula, fixed={}, stop=None):
+    names = [name for name in formula.variable_names() if name not in fixed]
+    low, high = names[:TRUTH_TABLE_BITS], names[TRUTH_TABLE_BITS:]
+    rows = 1 << len(low)
+    full = (1 << rows) - 1
+    masks = {name: full if value else 0 for name, value in fixed.items()}
+    for i, name in enumerate(low):
+        # rows in which the i-th variable is true: 2^i zeroes, 2^i ones, 2^i zeroes, ...
+        period = 1 << (i + 1)
+        mask = ((1 << (1 << i)) - 1) << (1 << i)
+        while period < rows:
+            mask |= mask << period
+            period <<= 1
+        masks[name] = mask
+    for values in product([False, True], repeat=len(high)):
+        if stop is not None and stop.is_set():
+            return None
+        for name, value in zip(high, values):
+            masks[name] = full if value else 0
+        falsified = full & ~formula.truth_table(masks, full)
+        if falsified:
+            # the lowest row in which the formula is false
+            row = (falsified & -falsified).bit_length() - 1
+            valuation = {name: bool(row >> i & 1) for i, name in enumerate(low)}
+            valuation.update(zip(high, values))
+            valuation.update(fixed)
+            return valuation
+    return None
+
+# the state of a process checking shards of the truth table: the formula and the event which stops the search
+shard_state = {}
+
+def init_shard_worker(packed, stop):
+    shard_state["formula"] = packed.unpack()
+    shard_state["stop"] = stop
+
+def check_shard(fixed):
+    return table_counterexample(shard_state["formula"], fixed, shard_state["stop"])
+
+# the space of valuations is split into 2^split shards by fixing the first "split" variables of the formula
+# (by default there are about 4 shards per worker) and the shards are checked by a pool of "workers" processes
+# (by default one per CPU); the formula is sent to every process once in its packed form
+# the first counterexample found cancels the shards which have not started yet and stops the running ones
+def parallel_counterexample(formula, workers=None, split=None):
+    names = formula.variable_names()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if split is None:
+        split = (4 * workers - 1).bit_length()
+    split = min(split, len(names))
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(workers, initializer=init_shard_worker, initargs=(formula.pack(), stop)) as executor:
+        futures = [executor.submit(check_shard, dict(zip(names, values))) for values in product([False, True], repeat=split)]
+        try:
+            for future in as_completed(futures):
+                valuation = future.result()
+                if valuation is not None:
+                    return valuation
+            return None
+        finally:
+            stop.set()
+            executor.shutdown(cancel_futures=True)
+
+# the number of models of a simplified formula over its own variables (the helper of Formula.count_models)
+# "cache" maps formulas to their counts and "names" maps formulas to the lists of their variables
+# the subproblems are counted with an explicit stack, as a formula can be split once per variable: a frame
+# (formula, None) asks for the count of the formula and (formula, plan) combines the counts of its subproblems
+def count_models(formula, cache, names):
+    stack = [(formula, None)]
+    while stack:
+        f, plan = stack.pop()
+        if plan is None:
+            if isinstance(f, Constant) or f in cache:
+                continue
+            plan = count_plan(f, names)
+            stack.append((f, plan))
+            stack.extend((sub, None) for sub, shift in plan[2])
+            continue
+        kind, base, subproblems = plan
+        counts = [(int(sub.value) if isinstance(sub, Constant) else cache[sub]) << shift for sub, shift in subproblems]
+        if kind == "sum":
+            result = base + sum(counts)
+        else:
+            result = 1
+            for (sub, shift), count in zip(subproblems, counts):
+                if kind == "disjunction":
+                    # the number of valuations of the component for which it is false
+                    count = (1 << len(names[sub])) - count
+                result *= count
+            if kind == "disjunction":
+                result = base - result
+        cache[f] = result
+    return int(formula.value) if isinstance(formula, Constant) else cache[formula]
+
+# the subproblems of counting the models of a formula (a step of count_models), as a triple (kind, base, subproblems)
+# where "subproblems" is a list of pairs (formula, shift) and the count of a formula is multiplied by 2^shift;
+# the count of the formula is:
+# - "conjunction": the product of the counts of the independent components,
+# - "disjunction": base - the product of the numbers of non-models of the independent components,
+# - "sum": base + the sum of the counts of the two (or one) formulas obtained by fixing a variable
+def count_plan(formula, names):
+    if formula not in names:
+        names[formula] = formula.variable_names()
+    variables = names[formula]
+    operands = []
+    if isinstance(formula, And) or isinstance(formula, Or):
+        operands = junction_operands(formula)
+        components = independent_components(operands, names)
+        if len(components) > 1:
+            # the models of a conjunction of independent formulas are combinations of their models
+            # and a disjunction is false iff all its operands are false
+            subproblems = []
+            for component in components:
+                f = component[0]
+                for op in component[1:]:
+                    f = type(formula)(f, op)
+                if f not in names:
+                    names[f] = f.variable_names()
+                subproblems.append((f, 0))
+            if isinstance(formula, Or):
+                return "disjunction", 1 << len(variables), subproblems
+            return "conjunction", None, subproblems
+    values = (False, True)
+    # a literal which is an operand of a conjunction (disjunction) has only one value worth checking
+    for op in operands:
+        literal = op.sub if isinstance(op, Not) else op
+        if isinstance(literal, Variable):
+            name = literal.name
+            values = ((literal is op) == isinstance(formula, And),)
+            break
+    else:
+        # the occurrences are counted in the DAG (once per distinct parent subformula), as counting them
+        # in the tree would take exponential time for formulas with many shared subformulas
+        occurences = {}
+        visited = {formula}
+        stack = [formula]
+        while stack:
+            f = stack.pop()
+            if isinstance(f, Not):
+                subs = [f.sub]
+            elif isinstance(f, Variable) or isinstance(f, Constant):
+                subs = []
+            else:
+                subs = [f.sub1, f.sub2]
+            for sub in subs:
+                if isinstance(sub, Variable):
+                    occurences[sub.name] = occurences.get(sub.name, 0) + 1
+                elif sub not in visited:
+                    visited.add(sub)
+                    stack.append(sub)
+        name = max(variables, key=lambda name: occurences.get(name, 0))
+    base = 0
+    if len(values) == 1 and isinstance(formula, Or):
+        # the disjunction is true for every valuation in which the literal is true
+        base = 1 << (len(variables) - 1)
+    subproblems = []
+    for value in values:
+        f = formula.simplify_fully({name: value})
+        if f not in names:
+            names[f] = f.variable_names()
+        # the variables which disappeared from the formula can have any values
+        subproblems.append((f, len(variables) - 1 - len(names[f])))
+    return "sum", base, subproblems
+
+# group the formulas into lists such that formulas from different lists have no common variables
+# ("names" caches the variables of formulas)
+def independent_components(formulas, names):
+    # union-find over the formulas connected by common variables
+    parent = list(range(len(formulas)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    owners = {}
+    for i, f in enumerate(formulas):
+        if f not in names:
+            names[f] = f.variable_names()
+        for name in names[f]:
+            if name in owners:
+                parent[find(i)] = find(owners[name])
+            else:
+                owners[name] = i
+    groups = {}
+    for i, f in enumerate(formulas):
+        groups.setdefault(find(i), []).append(f)
+    return list(groups.values())
+
+# the function used by the simplification methods for rules like ⊥ ∨ P ≡ P
+def same(formula):
+    return formula
+
+# the values of the subformulas of "formula" computed bottom-up by truth_table and evaluate_batch
+# the value of a subformula is removed when it is taken for the last time (by its last parent), so only the values
+# which are still needed are kept
+class TransientValues(dict):
+    def __init__(self, formula):
+        super().__init__()
+        # how many times the value of every subformula will be taken (the value of the formula itself is only read)
+        self.uses = {formula: 1}
+        stack = [formula]
+        while stack:
+            f = stack.pop()
+            if isinstance(f, Not):
+                subs = [f.sub]
+            elif isinstance(f, Variable) or isinstance(f, Constant):
+                subs = []
+            else:
+                subs = [f.sub1, f.sub2]
+            for sub in subs:
+                self.uses[sub] = self.uses.get(sub, 0) + 1
+                if self.uses[sub] == 1:
+                    stack.append(sub)
+    
+    def take(self, sub):
+        self.uses[sub] -= 1
+        return self[sub] if self.uses[sub] > 0 else self.pop(sub)
+
+# the result of a simplification method obtained by the rule with the left-hand side "rule" (counted by the profiler)
+def applied(rule, result):
+    if profiling is not None:
+        profiling.count(profiling.rules, rule)
+    return result
+
+# helpers of Formula.simplify_fully (their arguments are already simplified)
+
+# ¬P without double negations and negated constants
+def negation(formula):
+    if isinstance(formula, Not):
+        return formula.sub
+    if isinstance(formula, Constant):
+        return Constant(not formula.value)
+    return Not(formula)
+
+# the operands of nested conjunctions (if formula is an And) or disjunctions (if formula is an Or)
+# every operand is listed once (P ∧ P ≡ P, P ∨ P ≡ P) and a nested junction which is shared by several parents
+# is visited once, so the walk is linear in the size of the DAG and not of the tree it represents
+def junction_operands(formula):
+    cls = type(formula)
+    result = []
+    visited = set()
+    stack = [formula]
+    while stack:
+        f = stack.pop()
+        if f in visited:
+            continue
+        visited.add(f)
+        if type(f) is cls:
+            stack.append(f.sub2)
+            stack.append(f.sub1)
+        else:
+            result.append(f)
+    return result
+
+# the conjunction (cls=And) or disjunction (cls=Or) of the formulas in "subs"
+# "operands" maps the already simplified conjunctions and disjunctions to the lists of their operands
+def simplified_junction(cls, subs, operands):
+    # ⊤ is neutral for ∧ and absorbing for ∨, ⊥ is the other way round
+    neutral = cls is And
+    ops = {}
+    for sub in subs:
+        for op in (operands[sub] if type(sub) is cls and sub in operands else [sub]):
+            if isinstance(op, Constant):
+                if op.value != neutral:
+                    return op
+            else:
+                # P ∧ P ≡ P
+                ops[op] = None
+    for op in ops:
+        # P ∧ ¬P ≡ ⊥, P ∨ ¬P ≡ ⊤
+        if isinstance(op, Not) and op.sub in ops:
+            return Constant(not neutral)
+    # P ∧ (P ∨ Q) ≡ P, P ∨ (P ∧ Q) ≡ P
+    result = []
+    for op in ops:
+        if not (type(op) is not cls and op in operands and any(o in ops for o in operands[op])):
+            result.append(op)
+    if len(result) == 0:
+        return Constant(neutral)
+    formula = result[0]
+    for op in result[1:]:
+        formula = cls(formula, op)
+    if len(result) > 1:
+        operands[formula] = result
+    return formula
+
+def simplified_implication(sub1, sub2):
+    # P ⟹ P ≡ ⊤
+    if sub1 is sub2:
+        return Constant(True)
+    if isinstance(sub1, Constant):
+        # ⊥ ⟹ P ≡ ⊤, ⊤ ⟹ P ≡ P
+        return sub2 if sub1.value else Constant(True)
+    if isinstance(sub2, Constant):
+        # P ⟹ ⊤ ≡ ⊤, P ⟹ ⊥ ≡ ¬P
+        return Constant(True) if sub2.value else negation(sub1)
+    # P ⟹ ¬P ≡ ¬P, ¬P ⟹ P ≡ P
+    if negation(sub1) is sub2:
+        return sub2
+    return Implies(sub1, sub2)
+
+def simplified_equivalence(sub1, sub2):
+    # P ⇔ P ≡ ⊤
+    if sub1 is sub2:
+        return Constant(True)
+    if isinstance(sub1, Constant):
+        # ⊤ ⇔ P ≡ P, ⊥ ⇔ P ≡ ¬P
+        return sub2 if sub1.value else negation(sub2)
+    if isinstance(sub2, Constant):
+        return sub1 if sub2.value else negation(sub1)
+    # P ⇔ ¬P ≡ ⊥
+    if negation(sub1) is sub2:
+        return Constant(False)
+    return Iff(sub1, sub2)
+
+# subexpressions nested deeper than this are computed in advance (Python limits the nesting of parentheses)
+COMPILE_MAX_DEPTH = 50
+
+# generate the source code of the function returned by Formula.compile
+# subformulas occuring more than once and subexpressions nested too deep are assigned to local variables
+# before the final expression (in the order of their dependencies), so they are computed once per call
+# and the code has no nested calls, which would exceed the recursion limit for formulas deeper than ~50000
+def compile_formula(formula, order):
+    positions = {name: i for i, name in enumerate(order)}
+    # subformulas occuring more than once are computed in advance, so they are not repeated in the code
+    occurences = {}
+    stack = [formula]
+    while stack:
+        f = stack.pop()
+        occurences[f] = occurences.get(f, 0) + 1
+        if occurences[f] == 1:
+            if isinstance(f, Not):
+                stack.append(f.sub)
+            elif not isinstance(f, Variable) and not isinstance(f, Constant):
+                stack.append(f.sub1)
+                stack.append(f.sub2)
+    
+    # for every subformula: its expression and the nesting depth of the expression
+    expressions = {}
+    depths = {}
+    assignments = []
+    stack = [formula]
+    while stack:
+        f = stack[-1]
+        if f in expressions:
+            stack.pop()
+            continue
+        if isinstance(f, Variable):
+            if f.name not in positions:
+                raise UnassignedVariable("Unassigned variable: " + f.name)
+            expressions[f] = "v" + str(positions[f.name])
+            depths[f] = 0
+            stack.pop()
+            continue
+        if isinstance(f, Constant):
+            expressions[f] = str(f.value)
+            depths[f] = 0
+            stack.pop()
+            continue
+        subs = [f.sub] if isinstance(f, Not) else [f.sub1, f.sub2]
+        pending = [sub for sub in subs if sub not in expressions]
+        if pending:
+            stack.extend(pending)
+            continue
+        e = [expressions[sub] for sub in subs]
+        if isinstance(f, Not):
+            expression = "not " + e[0]
+        elif isinstance(f, Or):
+            expression = e[0] + " or " + e[1]
+        elif isinstance(f, And):
+            expression = e[0] + " and " + e[1]
+        elif isinstance(f, Implies):
+            expression = "not " + e[0] + " or " + e[1]
+        else:
+            expression = e[0] + " == " + e[1]
+        expression = "(" + expression + ")"
+        depth = 1 + max(depths[sub] for sub in subs)
+        if occurences[f] > 1 or depth >= COMPILE_MAX_DEPTH:
+            name = "f" + str(len(assignments))
+            assignments.append("    " + name + " = " + expression + "\n")
+            expression = name
+            depth = 0
+        expressions[f] = expression
+        depths[f] = depth
+        stack.pop()
+    
+    parameters = ", ".join("v" + str(i) for i in range(len(order)))
+    source = "def formula(" + parameters + "):\n" + "".join(assignments) + "    return " + expressions[formula] + "\n"
+    namespace = {}
+    exec(compile(source, "<formula>", "exec"), namespace)
+    function = namespace["formula"]
+    function.variables = order
+    return function
+
+# a formula in the conjunctive (kind="cnf") or disjunctive (kind="dnf") normal form
+# "clauses" is a list of clauses (or terms) which are lists of literals: n stands for the n-th variable and -n for its negation
+# names[n - 1] is the name of the n-th variable (None for the additional variables of the Tseitin encoding)
+class NormalForm:
+    def __init__(self, kind, clauses, names):
+        self.kind = kind
+        self.clauses = clauses
+        self.names = names
+    
+    def __len__(self):
+        return len(self.clauses)
+    
+    def to_formula(self):
+        inner, outer = (Or, And) if self.kind == "cnf" else (And, Or)
+        
+        def literal(n):
+            name = self.names[abs(n) - 1]
+            if name is None:
+                raise ValueError("The variable " + str(abs(n)) + " has no name")
+            return Variable(name) if n > 0 else Not(Variable(name))
+        
+        result = None
+        for clause in self.clauses:
+            # the empty clause is false and the empty term is true
+            f = Constant(self.kind == "dnf")
+            if clause:
+                f = literal(clause[0])
+                for n in clause[1:]:
+                    f = inner(f, literal(n))
+            result = f if result is None else outer(result, f)
+        # the empty CNF is true and the empty DNF is false
+        return Constant(self.kind == "cnf") if result is None else result
+    
+    # the DIMACS CNF format used by SAT solvers (the names of variables are written in comments)
+    def to_dimacs(self):
+        if self.kind != "cnf":
+            raise ValueError("Only formulas in CNF can be written in the DIMACS format")
+        lines = ["c " + str(n) + " " + name for n, name in enumerate(self.names, 1) if name is not None]
+        lines.append("p cnf " + str(len(self.names)) + " " + str(len(self.clauses)))
+        for clause in self.clauses:
+            lines.append(" ".join(str(n) for n in clause + [0]))
+        return "\n".join(lines) + "\n"
+
+# the CNF (conjunctive=True) or DNF of a formula in the negation normal form, computed by distribution
+# the clauses (terms) of every subformula are computed once; clauses containing a literal and its negation are dropped
+def distributed(nnf, names, conjunctive, limit):
+    numbers = {name: n for n, name in enumerate(names, 1)}
+    # ∧ is the outer operator of CNF and ∨ of DNF
+    outer, inner = (And, Or) if conjunctive else (Or, And)
+    results = {}
+    stack = [nnf]
+    while stack:
+        f = stack[-1]
+        if f in results:
+            stack.pop()
+            continue
+        if isinstance(f, Constant):
+            # ⊤ is the empty CNF and the DNF with the empty term (⊥ the other way round)
+            results[f] = [] if f.value == conjunctive else [frozenset()]
+        elif isinstance(f, Variable):
+            results[f] = [frozenset([numbers[f.name]])]
+        elif isinstance(f, Not):
+            results[f] = [frozenset([-numbers[f.sub.name]])]
+        else:
+            if f.sub1 not in results or f.sub2 not in results:
+                stack.append(f.sub2)
+                stack.append(f.sub1)
+                continue
+            clauses1, clauses2 = results[f.sub1], results[f.sub2]
+            if isinstance(f, outer):
+                clauses = list(dict.fromkeys(clauses1 + clauses2))
+            else:
+                if len(clauses1) * len(clauses2) > limit:
+                    raise NormalFormTooLarge("The normal form has more than " + str(limit) + " clauses")
+                clauses = {}
+                for c1 in clauses1:
+                    for c2 in clauses2:
+                        c = c1 | c2
+                        if not any(-n in c for n in c):
+                            clauses[c] = None
+                clauses = list(clauses)
+            if len(clauses) > limit:
+                raise NormalFormTooLarge("The normal form has more than " + str(limit) + " clauses")
+            results[f] = clauses
+        stack.pop()
+    return NormalForm("cnf" if conjunctive else "dnf", [sorted(c, key=abs) for c in results[nnf]], names)
+
+# Tseitin encoding: every compound subformula gets a new variable which is equivalent to it,
+# so the number of clauses is linear in the size of the formula
+# clauses are lists of nonzero integers (like in the DIMACS format): n stands for the n-th variable and -n for its negation
+# the result is a pair (clauses, numbers), where "numbers" maps the names of variables of the formula
+# (and the subformulas which got their own variables) to positive integers
+# the clauses are satisfiable iff the formula (or its negation if negated=True) is satisfiable
+def tseitin(formula, negated=False):
+    numbers = {}
+    clauses = []
+    # literals corresponding to already encoded subformulas (identical subformulas are the same object, so they are encoded once)
+    literals = {}
+    
+    def new_variable(key):
+        numbers[key] = len(numbers) + 1
+        return numbers[key]
+    
+    # the formula is traversed with an explicit stack, so deep formulas do not exceed the recursion limit
+    stack = [formula]
+    while stack:
+        f = stack[-1]
+        if f in literals:
+            stack.pop()
+            continue
+        if isinstance(f, Variable):
+            literals[f] = numbers[f.name] if f.name in numbers else new_variable(f.name)
+        elif isinstance(f, Constant):
+            # a single variable forced to be true represents ⊤
+            if True not in numbers:
+                clauses.append([new_variable(True)])
+            literals[f] = numbers[True] if f.value else -numbers[True]
+        elif isinstance(f, Not):
+            if f.sub not in literals:
+                stack.append(f.sub)
+                continue
+            literals[f] = -literals[f.sub]
+        else:
+            if f.sub1 not in literals or f.sub2 not in literals:
+                stack.append(f.sub1)
+                stack.append(f.sub2)
+                continue
+            a, b = literals[f.sub1], literals[f.sub2]
+            x = new_variable(f)
+            if isinstance(f, Or):
+                # x ⇔ a ∨ b
+                clauses += [[-x, a, b], [x, -a], [x, -b]]
+            elif isinstance(f, And):
+                # x ⇔ a ∧ b
+                clauses += [[-x, a], [-x, b], [x, -a, -b]]
+            elif isinstance(f, Implies):
+                # x ⇔ ¬a ∨ b
+                clauses += [[-x, -a, b], [x, a], [x, -b]]
+            else:
+                # x ⇔ (a ⇔ b)
+                clauses += [[-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]]
+            literals[f] = x
+        stack.pop()
+    root = literals[formula]
+    clauses.append([-root] if negated else [root])
+    return clauses, numbers
+
+# a CDCL SAT solver: unit propagation with two watched literals, learning of first UIP clauses,
+# VSIDS-like branching heuristic, phase saving and restarts (https://en.wikipedia.org/wiki/Conflict-driven_clause_learning)
+class SATSolver:
+    def __init__(self, variables_count):
+        self.n = variables_count
+        # values of literals: values[l] is True, False or None (unassigned)
+        # negative literals index the list from the end, so the list has 2n + 1 elements
+        self.values = [None] * (2 * variables_count + 1)
+        # watches[l] contains clauses in which l is one of the two watched literals (the first two literals of a clause)
+        self.watches = [[] for _ in range(2 * variables_count + 1)]
+        self.level = [0] * (variables_count + 1)
+        self.reason = [None] * (variables_count + 1)
+        self.activity = [0.0] * (variables_count + 1)
+        self.increment = 1.0
+        self.phase = [False] * (variables_count + 1)
+        self.heap = [(0.0, v) for v in range(1, variables_count + 1)]
+        self.trail = []
+        # trail_start[i] is the position in the trail where the (i + 1)-th decision level starts
+        self.trail_start = []
+        self.head = 0
+        self.units = []
+        self.ok = True
+    
+    def add_clause(self, clause):
+        clause = list(dict.fromkeys(clause))
+        for lit in clause:
+            if lit == 0 or abs(lit) > self.n:
+                raise ValueError("Invalid literal: " + str(lit))
+            # the clause contains l and ¬l, so it is always satisfied
+            if -lit in clause:
+                return
+        if len(clause) == 0:
+            self.ok = False
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+    
+    def assign(self, lit, reason):
+        self.values[lit] = True
+        self.values[-lit] = False
+        self.level[abs(lit)] = len(self.trail_start)
+        self.reason[abs(lit)] = reason
+        self.trail.append(lit)
+    
+    # return a clause whose all literals are false or None if there is no conflict
+    def propagate(self):
+        values = self.values
+        while self.head < len(self.trail):
+            false_lit = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches[false_lit]
+            self.watches[false_lit] = kept = []
+            for i, clause in enumerate(watchers):
+                # the false literal is moved to the second position
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if values[first]:
+                    kept.append(clause)
+                    continue
+                # look for a new literal to watch
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if values[lit] is not False:
+                        clause[1], clause[k] = lit, false_lit
+                        self.watches[lit].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] is False:
+                        kept.extend(watchers[i + 1:])
+                        return clause
+                    # the clause is unit
+                    self.assign(first, clause)
+        return None
+    
+    # find the first UIP clause and the level to which the solver should backtrack
+    def analyze(self, conflict):
+        seen = set()
+        learnt = [None]
+        level = len(self.trail_start)
+        counter = 0
+        lit = None
+        i = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                v = abs(q)
+                if q != lit and v not in seen and self.level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if self.level[v] == level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            # the last assigned literal which took part in the conflict
+            while abs(self.trail[i]) not in seen:
+                i -= 1
+            lit = self.trail[i]
+            i -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reason[abs(lit)]
+        learnt[0] = -lit
+        if len(learnt) == 1:
+            return learnt, 0
+        # the literal with the highest level is watched together with the asserting one
+        k = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[k] = learnt[k], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+    
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[u], u) for u in range(1, self.n + 1) if self.values[u] is None]
+            heapify(self.heap)
+        else:
+            heappush(self.heap, (-self.activity[v], v))
+    
+    def backtrack(self, level):
+        if len(self.trail_start) <= level:
+            return
+        start = self.trail_start[level]
+        for lit in self.trail[start:]:
+            v = abs(lit)
+            self.values[lit] = self.values[-lit] = None
+            self.reason[v] = None
+            self.phase[v] = lit > 0
+            heappush(self.heap, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_start[level:]
+        self.head = len(self.trail)
+    
+    # an unassigned variable with the highest activity (the heap can contain outdated entries which are skipped)
+    def pick_variable(self):
+        while self.heap:
+            _, v = heappop(self.heap)
+            if self.values[v] is None:
+                return v
+        return None
+    
+    # return a list whose v-th element is the value of the v-th variable in a model or None if the clauses are unsatisfiable
+    def solve(self):
+        if not self.ok:
+            return None
+        self.backtrack(0)
+        for lit in self.units:
+            if self.values[lit] is False:
+                return None
+            if self.values[lit] is None:
+                self.assign(lit, None)
+        conflicts = 0
+        restart = 1
+        limit = 100 * luby(restart)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if len(self.trail_start) == 0:
+                    self.ok = False
+                    return None
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.units.append(learnt[0])
+                    self.assign(learnt[0], None)
+                else:
+                    self.watches[learnt[0]].append(learnt)
+                    self.watches[learnt[1]].append(learnt)
+                    self.assign(learnt[0], learnt)
+                self.increment /= 0.95
+                conflicts += 1
+                if conflicts == limit:
+                    conflicts = 0
+                    restart += 1
+                    limit = 100 * luby(restart)
+                    self.backtrack(0)
+            else:
+                v = self.pick_variable()
+                if v is None:
+                    return [None] + self.values[1:self.n + 1]
+                self.trail_start.append(len(self.trail))
+                self.assign(v if self.phase[v] else -v, None)
+
+# the i-th element of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ... (used for restarts)
+def luby(i):
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+# reduced ordered binary decision diagrams (https://en.wikipedia.org/wiki/Binary_decision_diagram)
+# a BDD object is a manager which stores nodes of many diagrams, so equal subfunctions are represented by the same node
+# nodes are integers: 0 is ⊥, 1 is ⊤ and every other node n tests the variable at the level levels[n]
+# and leads to low[n] if the variable is false and to high[n] if it is true
+# variables are ordered as in "order" and variables not mentioned there are put after them in order of first occurence
+class BDD:
+    # the truth tables of the binary operators
+    operators = {
+        Or: lambda a, b: a or b,
+        And: lambda a, b: a and b,
+        Implies: lambda a, b: not a or b,
+        Iff: lambda a, b: a == b
+    }
+    
+    # at most "max_cache" results of apply are cached (the cache is emptied when it is full)
+    # and when there are more than "max_nodes" nodes, all tables are flushed before the next query (see clear)
+    def __init__(self, order=(), max_cache=None, max_nodes=None):
+        self.order = []
+        self.positions = {}
+        for name in order:
+            self.level(name)
+        self.max_cache = max_cache
+        self.max_nodes = max_nodes
+        self.clear()
+    
+    # forget all nodes and cached results (the order of variables is kept)
+    # the nodes returned by build before are no longer valid
+    def clear(self):
+        # the terminal nodes are below all variables
+        self.levels = [float("inf"), float("inf")]
+        self.low = [0, 1]
+        self.high = [0, 1]
+        # the unique table: (level, low, high) -> node
+        self.unique = {}
+        # the cache of the results of apply: (operator, node, node) -> node
+        self.cache = {}
+        # already built formulas (an entry is removed when the formula is no longer used)
+        self.built = WeakKeyDictionary()
+    
+    # called at the start of every query, so that the nodes are never flushed in the middle of one
+    def flush_if_full(self):
+        if self.max_nodes is not None and len(self.levels) > self.max_nodes:
+            self.clear()
+    
+    # cache the result of apply or negate
+    def remember(self, key, u):
+        if self.max_cache is not None and len(self.cache) >= self.max_cache:
+            self.cache.clear()
+        self.cache[key] = u
+        return u
+    
+    # the level of a variable (a new variable is put at the bottom)
+    def level(self, name):
+        if name not in self.positions:
+            self.positions[name] = len(self.order)
+            self.order.append(name)
+        return self.positions[name]
+    
+    # the node testing the variable at "level" with children "low" and "high"
+    def node(self, level, low, high):
+        # redundant test
+        if low == high:
+            return low
+        key = (level, low, high)
+        if key not in self.unique:
+            self.unique[key] = len(self.levels)
+            self.levels.append(level)
+            self.low.append(low)
+            self.high.append(high)
+        return self.unique[key]
+    
+    def variable(self, name):
+        return self.node(self.level(name), 0, 1)
+    
+    # ¬P ≡ P ⇔ ⊥
+    def negate(self, u):
+        return self.apply(Iff, u, 0)
+    
+    # the result of apply which is known without the traversal of the diagrams (or None)
+    def shortcut(self, operator, u, v):
+        if u < 2 and v < 2:
+            return int(BDD.operators[operator](u == 1, v == 1))
+        # shortcuts which do not need the traversal of the other diagram
+        if operator is Or:
+            if u == 1 or v == 1:
+                return 1
+            if u == 0 or u == v:
+                return v
+            if v == 0:
+                return u
+        elif operator is And:
+            if u == 0 or v == 0:
+                return 0
+            if u == 1 or u == v:
+                return v
+            if v == 1:
+                return u
+        elif operator is Implies:
+            if u == 0 or v == 1 or u == v:
+                return 1
+            if u == 1:
+                return v
+        elif u == v:
+            return 1
+        return self.cache.get((operator, u, v))
+    
+    # combine two diagrams with a binary operator (one of Or, And, Implies, Iff)
+    # the pairs of nodes are combined in post-order with an explicit stack, so the depth of the diagrams
+    # (the number of variables) is not limited by the recursion limit
+    # the results are also kept in "results" until the end, because the cache may be emptied in the meantime
+    def apply(self, operator, u, v):
+        result = self.shortcut(operator, u, v)
+        if result is not None:
+            return result
+        levels, lows, highs, shortcut = self.levels, self.low, self.high, self.shortcut
+        results = {}
+        # pairs of nodes, each with the level and the pairs of its children and their results
+        # (None until they are known; a result found in the cache is kept, because the cache may be emptied)
+        stack = [(u, v, None)]
+        while stack:
+            a, b, children = stack[-1]
+            if children is None:
+                if (a, b) in results:
+                    stack.pop()
+                    continue
+                level = min(levels[a], levels[b])
+                a0, a1 = (lows[a], highs[a]) if levels[a] == level else (a, a)
+                b0, b1 = (lows[b], highs[b]) if levels[b] == level else (b, b)
+                low = shortcut(operator, a0, b0)
+                high = shortcut(operator, a1, b1)
+                if low is None or high is None:
+                    stack[-1] = (a, b, (level, a0, b0, a1, b1, low, high))
+                    if low is None:
+                        stack.append((a0, b0, None))
+                    if high is None:
+                        stack.append((a1, b1, None))
+                    continue
+            else:
+                level, a0, b0, a1, b1, low, high = children
+                if low is None:
+                    low = results[(a0, b0)]
+                if high is None:
+                    high = results[(a1, b1)]
+            results[(a, b)] = self.remember((operator, a, b), self.node(level, low, high))
+            stack.pop()
+        return results[(u, v)]
+    
+    # the node representing the formula
+    def build(self, formula):
+        if formula in self.built:
+            return self.built[formula]
+        # post-order traversal with an explicit stack
+        stack = [formula]
+        while stack:
+            f = stack[-1]
+            if f in self.built:
+                stack.pop()
+                continue
+            if isinstance(f, Variable):
+                u = self.variable(f.name)
+            elif isinstance(f, Constant):
+                u = 1 if f.value else 0
+            elif isinstance(f, Not):
+                if f.sub not in self.built:
+                    stack.append(f.sub)
+                    continue
+                u = self.negate(self.built[f.sub])
+            else:
+                if f.sub1 not in self.built or f.sub2 not in self.built:
+                    stack.append(f.sub1)
+                    stack.append(f.sub2)
+                    continue
+                u = self.apply(type(f), self.built[f.sub1], self.built[f.sub2])
+            self.built[f] = u
+            stack.pop()
+        return self.built[formula]
+    
+    def tautology(self, formula):
+        self.flush_if_full()
+        return self.build(formula) == 1
+    
+    def equivalent(self, formula1, formula2):
+        self.flush_if_full()
+        return self.build(formula1) == self.build(formula2)
+    
+    # a valuation of the variables of the formula for which it is false or None if the formula is a tautology
+    def counterexample(self, formula):
+        self.flush_if_full()
+        u = self.build(formula)
+        if u == 1:
+            return None
+        valuation = {name: False for name in formula.variable_names()}
+        # every non-terminal node represents a non-constant function, so it has a path to ⊥
+        while u > 1:
+            name = self.order[self.levels[u]]
+            if self.low[u] != 1:
+                valuation[name] = False
+                u = self.low[u]
+            else:
+                valuation[name] = True
+                u = self.high[u]
+        return valuation
+    
+    # the number of valuations of "variables" (by default the variables of the formula) for which the formula is true
+    def count_models(self, formula, variables=None):
+        self.flush_if_full()
+        u = self.build(formula)
+        if variables is None:
+            variables = formula.variable_names()
+        levels = sorted(self.level(name) for name in set(variables))
+        # rank[l] is the number of counted variables above the level l
+        rank = {level: i for i, level in enumerate(levels)}
+        rank[float("inf")] = len(levels)
+        for n in self.nodes(u):
+            if self.levels[n] not in rank:
+                raise ValueError("The formula depends on a variable which is not counted: " + self.order[self.levels[n]])
+        # models of the function represented by a node over the variables at and below its level
+        # (computed in post-order with an explicit stack)
+        counts = {0: 0, 1: 1}
+        stack = [u]
+        while stack:
+            n = stack[-1]
+            if n in counts:
+                stack.pop()
+                continue
+            low, high = self.low[n], self.high[n]
+            if low not in counts or high not in counts:
+                stack.append(low)
+                stack.append(high)
+                continue
+            r = rank[self.levels[n]]
+            counts[n] = (counts[low] << (rank[self.levels[low]] - r - 1)) + (counts[high] << (rank[self.levels[high]] - r - 1))
+            stack.pop()
+        return counts[u] << rank[self.levels[u]]
+    
+    # all nodes reachable from u
+    def nodes(self, u):
+        visited = {u}
+        stack = [u]
+        while stack:
+            n = stack.pop()
+            if n > 1:
+                for child in (self.low[n], self.high[n]):
+                    if child not in visited:
+                        visited.add(child)
+                        stack.append(child)
+        return visited
+    
+    # the number of nodes of the diagram (including the terminal ones)
+    def size(self, u):
+        return len(self.nodes(u))
+
+# the manager used by Formula.tautology(..., method="bdd") and Formula.equivalent, so many queries share its tables
+# the tables would grow with every query, so the apply cache is bounded and all nodes are flushed
+# before a query once there are more than 2^20 of them (SHARED_BDD.clear() flushes them at any time)
+SHARED_BDD = BDD(max_cache=1 << 20, max_nodes=1 << 20)
+
+# a cache of the answers to tautology, satisfiability and equivalence queries
+# formulas are identified by fingerprints which do not depend on the names of variables (see DecisionCache.fingerprint),
+# so a formula with renamed variables hits the cache too
+# at most "maxsize" answers are kept in memory (the least recently used ones are dropped);
+# if "path" is given, the answers are also stored in an SQLite database, so they survive restarts
+# "method" is passed to Formula.tautology
+class DecisionCache:
+    def __init__(self, maxsize=1024, path=None, method="truth_table"):
+        self.maxsize = maxsize
+        self.method = method
+        self.results = OrderedDict()
+        self.fingerprints = WeakKeyDictionary()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS Results (key BLOB PRIMARY KEY, value INTEGER)")
+            self.db.commit()
+    
+    # the formula is packed (variables are numbered in order of first occurence, so their names do not matter)
+    # and the instructions are hashed
+    def fingerprint(self, formula):
+        if formula not in self.fingerprints:
+            packed = formula.pack()
+            digest = blake2b(digest_size=16)
+            digest.update(packed.opcodes.tobytes())
+            digest.update(packed.first.tobytes())
+            digest.update(packed.second.tobytes())
+            self.fingerprints[formula] = digest.digest()
+        return self.fingerprints[formula]
+    
+    # the answer stored under the key or the result of decide() which is then stored
+    def lookup(self, key, decide):
+        if key in self.results:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return self.results[key]
+        result = None
+        if self.db is not None:
+            row = self.db.execute("SELECT value FROM Results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                result = bool(row[0])
+        if result is None:
+            self.misses += 1
+            result = decide()
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO Results VALUES (?, ?)", (key, int(result)))
+                self.db.commit()
+        self.results[key] = result
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+        return result
+    
+    def tautology(self, formula):
+        return self.lookup(b"T" + self.fingerprint(formula), lambda: Formula.tautology(formula, self.method))
+    
+    def satisfiable(self, formula):
+        return self.lookup(b"S" + self.fingerprint(formula), lambda: not Formula.tautology(Not(formula), self.method))
+    
+    def equivalent(self, formula1, formula2):
+        formula = Iff(formula1, formula2)
+        return self.lookup(b"E" + self.fingerprint(formula), lambda: Formula.tautology(formula, self.method))
+    
+    def statistics(self):
+        queries = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / queries if queries > 0 else 0.0,
+            "size": len(self.results)
+        }
+    
+    def clear(self):
+        self.results.clear()
+        self.hits = self.disk_hits = self.misses = 0
+    
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+# a reproducible generator of random formulas
+# "variables" is the number of variables (named x0, x1, ...) or a list of names
+# "weights" gives the relative frequencies of the kinds of nodes: "constant", "variable", "or", "and", "implies", "iff", "not"
+# (missing kinds get weight 1, like in generate_formula)
+# with interned=False the nodes are not interned (see Formula.uninterned): a node takes ~100 B instead of ~220 B,
+# but equal subformulas are no longer shared (only the variables are), so it pays off for corpora with few repeated
+# subformulas, e.g. many variables, which are only stored, packed or written to a file
+class FormulaGenerator:
+    kinds = ["constant", "variable", "or", "and", "implies", "iff", "not"]
+    binary = {"or": Or, "and": And, "implies": Implies, "iff": Iff}
+    
+    def __init__(self, seed=None, variables=4, weights=None, interned=True):
+        self.random = Random(seed)
+        self.interned = interned
+        if isinstance(variables, int):
+            variables = ["x" + str(i) for i in range(variables)]
+        self.variables = [Variable(name) for name in variables]
+        if len(self.variables) == 0:
+            raise ValueError("At least one variable is needed")
+        weights = dict(weights or {})
+        for kind in weights:
+            if kind not in FormulaGenerator.kinds:
+                raise ValueError("Unknown kind of node: " + str(kind))
+        self.weights = [weights.get(kind, 1) for kind in FormulaGenerator.kinds]
+    
+    # pick a kind of node among the given ones according to the weights
+    def kind(self, kinds):
+        weights = [w for k, w in zip(FormulaGenerator.kinds, self.weights) if k in kinds]
+        if sum(weights) <= 0:
+            raise ValueError("The weights of " + ", ".join(kinds) + " cannot be all zero")
+        return self.random.choices(kinds, weights)[0]
+    
+    # a formula with exactly "size" nodes (the tree is built with an explicit stack, so it can be large)
+    def formula(self, size):
+        if size < 1:
+            raise ValueError("The size of a formula has to be positive")
+        # every element is [kind, size, subformulas built so far, size of the second subformula]
+        stack = [[None, size, [], 0]]
+        while True:
+            node = stack[-1]
+            kind, size, subs, right = node
+            if kind is None:
+                if size == 1:
+                    kind = self.kind(["constant", "variable"])
+                elif size == 2:
+                    kind = "not"
+                else:
+                    kind = self.kind(["or", "and", "implies", "iff", "not"])
+                node[0] = kind
+            if kind == "constant":
+                result = self.node(Constant, self.random.random() < 0.5)
+            elif kind == "variable":
+                result = self.random.choice(self.variables)
+            elif kind == "not":
+                if not subs:
+                    stack.append([None, size - 1, [], 0])
+                    continue
+                result = self.node(Not, subs[0])
+            else:
+                if not subs:
+                    # the nodes of the subformulas are split randomly between them
+                    left = self.random.randint(1, size - 2)
+                    node[3] = size - 1 - left
+                    stack.append([None, left, [], 0])
+                    continue
+                if len(subs) == 1:
+                    stack.append([None, right, [], 0])
+                    continue
+                result = self.node(FormulaGenerator.binary[kind], subs[0], subs[1])
+            stack.pop()
+            if not stack:
+                return result
+            stack[-1][2].append(result)
+    
+    def node(self, cls, *args):
+        return cls(*args) if self.interned else cls.uninterned(*args)
+    
+    # generate "count" formulas whose sizes are drawn uniformly from the range "sizes" (a pair) or equal to "sizes"
+    def corpus(self, count, sizes):
+        low, high = (sizes, sizes) if isinstance(sizes, int) else sizes
+        for _ in range(count):
+            yield self.formula(self.random.randint(low, high))
+    
+    # write a corpus to a file (one formula per line, see load_formulas) without keeping it in memory
+    def write(self, path, count, sizes):
+        save_formulas(path, self.corpus(count, sizes))
+
+# opt-in instrumentation of the formula engine
+# while a profiler is enabled, it is stored in "profiling" and the methods of the Formula classes update its counters
+# (a disabled profiler costs one comparison with None); it counts:
+# - evaluated nodes of every type ("evaluations"),
+# - applications of the rules of simplified() named by their left-hand sides, e.g. "⊥ ∨ P" ("rules"),
+# - valuations checked by Formula.tautology, including rows of the truth tables ("assignments"),
+# - calls and total time of the main operations ("phases"), measured by wrappers installed only while it is enabled
+# it can be used as a context manager: with PROFILER: ...
+class Profiler:
+    # the timed operations: (owner, attribute name, phase name)
+    phases = [
+        (Formula, "simplified", "simplified"),
+        (Formula, "simplify_fully", "simplify_fully"),
+        (Formula, "tautology", "tautology"),
+        (Formula, "counterexample", "counterexample"),
+        (Formula, "find_model", "find_model"),
+        (Formula, "count_models", "count_models"),
+        (Formula, "parse", "parse"),
+        (Formula, "compile", "compile"),
+        (Formula, "to_nnf", "to_nnf"),
+        (Formula, "to_cnf", "to_cnf"),
+        (Formula, "to_dnf", "to_dnf"),
+        (BDD, "build", "bdd_build")
+    ]
+    
+    def __init__(self):
+        self.originals = {}
+        self.reset()
+    
+    def reset(self):
+        self.evaluations = {}
+        self.rules = {}
+        self.assignments = 0
+        self.times = {}
+        self.calls = {}
+        # how many evaluations and recursive tautology checks are in progress
+        self.evaluating = 0
+        self.checking = 0
+    
+    def enabled(self):
+        return profiling is self
+    
+    def enable(self):
+        global profiling
+        if profiling is self:
+            return
+        if profiling is not None:
+            raise RuntimeError("Another profiler is already enabled")
+        profiling = self
+        for owner, name, phase in Profiler.phases:
+            self.replace(owner, name, self.timed(owner.__dict__[name], phase))
+        for cls in [Formula, Variable, Constant]:
+            self.replace(cls, "evaluate", self.timed_evaluate(cls.evaluate))
+    
+    def disable(self):
+        global profiling
+        if profiling is not self:
+            return
+        for (owner, name), original in self.originals.items():
+            setattr(owner, name, original)
+        self.originals = {}
+        profiling = None
+    
+    def __enter__(self):
+        self.enable()
+        return self
+    
+    def __exit__(self, *exception):
+        self.disable()
+    
+    def replace(self, owner, name, function):
+        self.originals[(owner, name)] = owner.__dict__[name]
+        setattr(owner, name, function)
+    
+    # the counters as a dictionary (times are in seconds)
+    def snapshot(self):
+        return {
+            "evaluations": dict(self.evaluations),
+            "rules": dict(self.rules),
+            "assignments": self.assignments,
+            "phases": {phase: {"calls": self.calls[phase], "seconds": self.times[phase]} for phase in self.calls}
+        }
+    
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+    
+    def timed(self, method, phase):
+        static = isinstance(method, staticmethod)
+        function = method.__func__ if static else method
+        
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.times[phase] = self.times.get(phase, 0.0) + perf_counter() - start
+                self.calls[phase] = self.calls.get(phase, 0) + 1
+        
+        if phase == "tautology":
+            # the recursive method checks valuations with evaluate, so its top-level calls are counted as assignments
+            def tautology(formula, method="truth_table", *args, **kwargs):
+                if method != "recursive":
+                    return wrapper(formula, method, *args, **kwargs)
+                self.checking += 1
+                try:
+                    return wrapper(formula, method, *args, **kwargs)
+                finally:
+                    self.checking -= 1
+            return staticmethod(tautology)
+        return staticmethod(wrapper) if static else wrapper
+    
+    # only the top-level evaluations are timed (Formula.evaluate calls evaluate of the leaves)
+    def timed_evaluate(self, evaluate):
+        def wrapper(formula, variables):
+            if self.evaluating > 0:
+                return evaluate(formula, variables)
+            if self.checking > 0:
+                self.assignments += 1
+            self.evaluating += 1
+            start = perf_counter()
+            try:
+                return evaluate(formula, variables)
+            finally:
+                self.evaluating -= 1
+                self.times["evaluate"] = self.times.get("evaluate", 0.0) + perf_counter() - start
+                self.count(self.calls, "evaluate")
+        return wrapper
+    
+    def count(self, counter, key, n=1):
+        counter[key] = counter.get(key, 0) + n
+
+# the profiler of the formula engine (disabled until PROFILER.enable() is called)
+PROFILER = Profiler()
+
 def generate_formula(n):
     if n == 0:
         options = ["constant", "variable"]
@@ -278,62 +2343,112 @@ def generate_formula(n):
 # Tests
 ##############################################
 
-formula1 = Or(Not(Variable("p")), And(Variable("q"), Constant(True)))
-formula2 = Implies(And(Variable("p"), Constant(False)), Not(Iff(Variable("q"), Variable("p"))))
-print(formula1)
-print(formula1.simplified())
-print()
-print(formula2)
-print(formula2.simplified())
-print(formula2.simplified().simplified())
-print()
-print(formula1 + formula2)
-print(formula1 * formula2)
-print()
-print(Formula.tautology(formula1))
-print(Formula.tautology(formula2))
-print()
-print(formula1.evaluate({"p": False, "q": False}))
-print(formula1.evaluate({"p": False, "q": True}))
-print(formula1.evaluate({"p": True, "q": False}))
-print(formula1.evaluate({"p": True, "q": True}))
-try:
-    formula = And(Constant(True), "abc")
-except TypeError as e:
-    print(e)
-try:
-    print(formula1.evaluate({"p": "hello", "q": False}))
-except TypeError as e:
-    print(e)
-try:
-    print(formula1.evaluate({"p": True}))
-except UnassignedVariable as e:
-    print(e)
-try:
-    formula = Or(Variable("⊥"), Not(Variable("q")))
-except InvalidVariableName as e:
-    print(e)
-print()
-
-# De Morgan's laws
-de_morgan_1 = Iff(Not(And(Variable("p"), Variable("q"))), Or(Not(Variable("p")), Not(Variable("q"))))
-de_morgan_2 = Iff(Not(Or(Variable("p"), Variable("q"))), And(Not(Variable("p")), Not(Variable("q"))))
-print(de_morgan_1)
-print(de_morgan_2)
-print(de_morgan_1 + de_morgan_2)
-print(de_morgan_1 * de_morgan_2)
-print(Formula.tautology(de_morgan_1))
-print(Formula.tautology(de_morgan_2))
-print()
-
-# generate 10 random formulas, simplify them as much as possible and check if they are tautologies
-for i in range(10):
-    formula = generate_formula(randrange(3, 7))
-    print(formula)
-    prev = str(formula)
-    cur = formula.simplified()
-    while str(cur) != prev:
-        print(cur)
-        prev, cur = str(cur), cur.simplified()
-    print(Formula.tautology(formula))
-    print()
\ No newline at end of file
+# the tests are run only when the file is executed as a script, so the classes can be imported (e.g. by benchmark.py)
+if __name__ == "__main__":
+    formula1 = Or(Not(Variable("p")), And(Variable("q"), Constant(True)))
+    formula2 = Implies(And(Variable("p"), Constant(False)), Not(Iff(Variable("q"), Variable("p"))))
+    print(formula1)
+    print(formula1.simplified())
+    print()
+    print(formula2)
+    print(formula2.simplified())
+    print(formula2.simplified().simplified())
+    print(formula2.simplify_fully())
+    print()
+    print(formula1 + formula2)
+    print(formula1 * formula2)
+    print()
+    print(Formula.tautology(formula1))
+    print(Formula.tautology(formula2))
+    print(Formula.tautology(formula1, method="recursive"))
+    print(Formula.counterexample(formula1))
+    print(Formula.counterexample(formula2))
+    print()
+    print(formula1.evaluate({"p": False, "q": False}))
+    print(formula1.evaluate({"p": False, "q": True}))
+    print(formula1.evaluate({"p": True, "q": False}))
+    print(formula1.evaluate({"p": True, "q": True}))
+    compiled = formula1.compile()
+    print(compiled.variables, compiled(False, False), compiled(True, False))
+    packed = formula2.pack()
+    print(len(packed), packed.names, packed.unpack() is formula2, packed.evaluate({"p": True, "q": False}))
+    print(Formula.parse(str(formula2)) is formula2, Formula.parse("p ∨ q ∧ ¬r ⟹ s ⇔ ⊤"))
+    try:
+        Formula.parse("p ∨ (q ∧")
+    except ParseError as e:
+        print(e)
+    try:
+        import numpy
+        print(formula1.evaluate_batch({"p": numpy.array([False, False, True, True]), "q": numpy.array([False, True, False, True])}))
+    except ImportError:
+        pass
+    try:
+        formula = And(Constant(True), "abc")
+    except TypeError as e:
+        print(e)
+    try:
+        print(formula1.evaluate({"p": "hello", "q": False}))
+    except TypeError as e:
+        print(e)
+    try:
+        print(formula1.evaluate({"p": True}))
+    except UnassignedVariable as e:
+        print(e)
+    try:
+        formula = Or(Variable("⊥"), Not(Variable("q")))
+    except InvalidVariableName as e:
+        print(e)
+    print()
+
+    # De Morgan's laws
+    de_morgan_1 = Iff(Not(And(Variable("p"), Variable("q"))), Or(Not(Variable("p")), Not(Variable("q"))))
+    de_morgan_2 = Iff(Not(Or(Variable("p"), Variable("q"))), And(Not(Variable("p")), Not(Variable("q"))))
+    print(de_morgan_1)
+    print(de_morgan_2)
+    print(de_morgan_1 + de_morgan_2)
+    print(de_morgan_1 * de_morgan_2)
+    print(Formula.tautology(de_morgan_1))
+    print(Formula.tautology(de_morgan_2))
+    print()
+
+    # generate 10 random formulas, simplify them as much as possible and check if they are tautologies
+    for i in range(10):
+        formula = generate_formula(randrange(3, 7))
+        print(formula)
+        prev = str(formula)
+        cur = formula.simplified()
+        while str(cur) != prev:
+            print(cur)
+            prev, cur = str(cur), cur.simplified()
+        print(formula.simplify_fully())
+        print(Formula.tautology(formula))
+        print()
+    
+    print(Formula.satisfiable(formula1))
+    print(Formula.find_model(formula1))
+    print(Formula.find_model(And(Variable("p"), Not(Variable("p")))))
+    print(Formula.tautology(de_morgan_1, method="sat"))
+    print(Formula.counterexample(formula1, method="sat"))
+    print()
+    
+    print(Formula.tautology(de_morgan_1, method="bdd"))
+    print(Formula.counterexample(formula1, method="bdd"))
+    print(Formula.equivalent(Not(And(Variable("p"), Variable("q"))), Or(Not(Variable("p")), Not(Variable("q")))))
+    print(list(formula1.models()))
+    print(formula1.count_models(), formula1.count_models(["p", "q", "r"]))
+    cache = DecisionCache(maxsize=16)
+    print(cache.tautology(de_morgan_1), cache.tautology(Formula.parse(str(de_morgan_1).replace("p", "x"))), cache.statistics())
+    print(de_morgan_1.to_nnf())
+    print(de_morgan_1.to_cnf("equivalent").to_formula(), de_morgan_1.to_dnf().to_formula())
+    print(formula2.to_cnf().to_dimacs())
+    generator = FormulaGenerator(seed=1, variables=["p", "q", "r"], weights={"iff": 0, "constant": 0.2})
+    for formula in generator.corpus(3, (5, 15)):
+        print(formula)
+    with PROFILER:
+        formula2.simplified()
+        Formula.tautology(de_morgan_1, method="recursive")
+        Formula.tautology(de_morgan_2)
+    print(PROFILER.to_json())
+    bdd = BDD(order=["q", "p"])
+    print(bdd.count_models(formula1))
+    print(bdd.count_models(formula1, ["p", "q", "r"]))
@@ -1,23 +1,82 @@
-import urllib.request
 import urllib.parse
+import urllib.robotparser
 import bs4
+import html.parser
 import re
-import queue
+import asyncio
+import ssl
+import time
+import os
+import codecs
+import contextlib
+import sqlite3
+import math
+import string
+import heapq
+import itertools
 import threading
+from collections import deque
+from hashlib import blake2b
+from concurrent.futures import ProcessPoolExecutor
 
+# content may be the HTML code of the page or the page already parsed by BeautifulSoup
 def find_sentences(content):
-    soup = bs4.BeautifulSoup(content, "html.parser")
+    if isinstance(content, str):
+        content = bs4.BeautifulSoup(content, "html.parser")
+    # stripped_string is a generator yielding text from HTML tags
+    return python_sentences(content.stripped_strings)
+
+# find the sentences about Python in the text of the page (given as a sequence of strings)
+def python_sentences(strings):
     # a sentence is starting with a capital letter and ending with a dot, a question mark or an exclamation mark
     sentence_re = re.compile(r"[A-Z][^\.\?\!]*[\.\?\!]")
     python_re = re.compile(r"(((^Python)|(^\"Python\")|( Python)|( \"Python\")|(\"[^\"]* Python\")|( \(Python\))|(\([^\)]* Python\)))([\.\?\!]|([,:]? )))|((^\"Python)|( \"Python)[,:]? .*\")|((^\(Python)|( \(Python)[,:]? .*\))")
     res = []
-    # stripped_string is a generator yielding text from HTML tags
-    for string in soup.stripped_strings:
+    for string in strings:
         for sentence in sentence_re.finditer(string):
             if python_re.search(sentence.group()):
                 res.append(sentence.group())
     return res
 
+# a parser collecting the links and the text of a page without building a tree (it can be fed the page in parts)
+# the strings are the same as stripped_strings of BeautifulSoup and the links are the same as the ones found by crawl
+class PageScanner(html.parser.HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.strings = []
+        # how many script, style and template tags are open (their content is not text)
+        self.hidden = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href":
+                    if value is None:
+                        value = ""
+                    if LINK_RE.search(value):
+                        self.links.append(value)
+                    break
+        elif tag in ("script", "style", "template"):
+            self.hidden += 1
+    
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "template") and self.hidden > 0:
+            self.hidden -= 1
+    
+    def handle_data(self, data):
+        if self.hidden == 0:
+            self.add(data)
+    
+    def unknown_decl(self, data):
+        if data.startswith("CDATA["):
+            self.add(data[6:])
+    
+    def add(self, string):
+        string = string.strip()
+        if string:
+            self.strings.append(string)
+
 # encode non-ascii characters occuring in the link
 def quote_link(link):
     scheme, netloc, path, query, fragment = urllib.parse.urlsplit(link)
@@ -26,102 +85,1226 @@ def quote_link(link):
     fragment = urllib.parse.quote(fragment, safe="/%")
     return urllib.parse.urlunsplit((scheme, netloc, path, query, fragment))
 
-# I'm fetching and processing links in breadth-first order using queues
-# which are thread-safe data structures (https://docs.python.org/3/library/queue.html)
-def crawl(start_page, depth, action):
-    global links, contents, THREADS_COUNT
-    max_depth = depth
-    start_page = quote_link(start_page)
-    # a set of already processed links
-    processed = set()
-    link_re = re.compile(r"^\S*$")
-    links.put((start_page, 0))
-    processed.add(start_page)
-    # count how many pages are left
-    counter = 1
-    
-    # it would probably be possible to parallelize this loop too
-    # but it performs CPU-bound tasks, so using the "threading" library would not speed up the program due to GIL
-    while counter > 0:
-        # consume content
-        element = contents.get(block=True)
-        counter -= 1
-        # an error occured in one of the threads
-        if element is None:
-            continue
-        url, content, depth = element
-        soup = bs4.BeautifulSoup(content, "html.parser")
-        yield (url, action(content))
-        if depth < max_depth:
-            # find all "proper" links on the website
-            pages = (link.get("href") for link in soup.find_all("a", href=link_re))
-            for p in pages:
-                # p may be a relative link, so I join it with the base url
-                # if p is an absolute link, urljoin will not try to join it
-                p = urllib.parse.urljoin(url, quote_link(p))
-                # no links will be processed twice
-                if p not in processed:
-                    processed.add(p)
-                    # produce link
-                    links.put((p, depth + 1))
-                    counter += 1
-    # stop the threads by making them consume None
-    for _ in range(THREADS_COUNT):
-        links.put(None)
-
-def get_content():
-    global links, contents
+UNRESERVED = frozenset(string.ascii_letters + string.digits + "-._~")
+PERCENT_RE = re.compile(r"%([0-9A-Fa-f]{2})")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# decode the percent-encoded characters which do not need to be encoded and write the other escapes in upper case
+def normalize_percent(text):
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in UNRESERVED else "%" + match.group(1).upper()
+    return PERCENT_RE.sub(replace, text)
+
+# the canonical form of the url, so that the urls of the same page differing only in the fragment, the case
+# of the scheme and the host, the default port, the dot segments, the percent-encoding or a trailing slash are equal
+# it only identifies the pages (in VisitedSet and HTTPCache), they are fetched from their original urls,
+# because a server may serve different pages at a path with and without a trailing slash
+def normalize_url(url):
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    if not parts.netloc:
+        return urllib.parse.urlunsplit((scheme, "", parts.path, parts.query, ""))
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        host += f":{parts.port}"
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo += ":" + parts.password
+        host = userinfo + "@" + host
+    segments = []
+    for segment in normalize_percent(parts.path).split("/")[1:]:
+        if segment == "..":
+            if segments:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+    path = ("/" + "/".join(segments)).rstrip("/") or "/"
+    return urllib.parse.urlunsplit((scheme, host, path, normalize_percent(parts.query), ""))
+
+class HTTPError(Exception):
+    def __init__(self, status, reason):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.status = status
+        self.reason = reason
+
+class UnsupportedContent(Exception):
+    pass
+
+class Disallowed(Exception):
+    pass
+
+class PageTooLarge(Exception):
+    pass
+
+# how many pages are fetched at the same time
+CONCURRENCY = 100
+# how many pages are fetched from a single host at the same time
+PER_HOST = 2
+# how many seconds pass between the starts of requests to a single host (unless robots.txt asks for more)
+HOST_DELAY = 0.1
+USER_AGENT = "Mozilla/5.0"
+# how many seconds a single fetch may take
+TIMEOUT = 10
+REDIRECTS = 5
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+SSL_CONTEXT = ssl.create_default_context()
+# how many connections to a single host may be used at the same time
+MAX_PER_HOST = 10
+# how many connections may be used at the same time (and how many idle ones are kept)
+MAX_CONNECTIONS = CONCURRENCY
+# how many seconds an idle connection is kept open
+IDLE_TIMEOUT = 30
+# how many processes parse the pages
+PROCESSES = os.cpu_count() or 1
+# how many pages of a crawl may be in progress (being fetched or parsed or waiting for the caller)
+QUEUE_SIZE = 100
+LINK_RE = re.compile(r"^\S*$")
+# the largest page (in bytes) which is downloaded
+MAX_SIZE = 10 * 2 ** 20
+HTML_TYPES = {"text/html", "application/xhtml+xml"}
+# how many bytes from the beginning of the page are searched for the declared charset
+SNIFF_SIZE = 1024
+BOMS = [(codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")]
+# how many bytes of pages the cache keeps
+CACHE_SIZE = 1024 * 2 ** 20
+# the cache commits its changes once per this many requests (a commit waits for the disk and blocks the event loop)
+CACHE_COMMIT_BATCH = 100
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([-\w.:]+)""", re.IGNORECASE)
+
+class Connection:
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        # how many requests have been sent through the connection
+        self.requests = 0
+        self.last_used = time.monotonic()
+    
+    def close(self):
+        self.writer.close()
+
+# keep-alive connections are kept open after a response has been read, so the next request to the same host
+# can skip the TCP and TLS handshakes
+class ConnectionPool:
+    def __init__(self, max_per_host=MAX_PER_HOST, max_connections=MAX_CONNECTIONS, idle_timeout=IDLE_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        # (scheme, host, port) -> a stack of idle connections
+        self.idle = {}
+        self.idle_count = 0
+        # limit the number of connections in use per host and in total
+        self.hosts = {}
+        self.total = asyncio.Semaphore(max_connections)
+        self.last_sweep = time.monotonic()
+        self.closed = False
+        self.opened = 0
+        self.reused = 0
+        self.evicted = 0
+    
+    async def acquire(self, scheme, host, port):
+        key = (scheme, host, port)
+        if key not in self.hosts:
+            self.hosts[key] = asyncio.Semaphore(self.max_per_host)
+        # waiting for a busy host does not take a slot from the other hosts
+        await self.hosts[key].acquire()
+        try:
+            await self.total.acquire()
+        except BaseException:
+            self.hosts[key].release()
+            raise
+        try:
+            connection = self.take_idle(key)
+            if connection is None:
+                reader, writer = await asyncio.open_connection(
+                    host, port, ssl=SSL_CONTEXT if scheme == "https" else None
+                )
+                connection = Connection(key, reader, writer)
+                self.opened += 1
+            else:
+                self.reused += 1
+            connection.requests += 1
+            return connection
+        except BaseException:
+            self.hosts[key].release()
+            self.total.release()
+            raise
+    
+    def take_idle(self, key):
+        stack = self.idle.get(key)
+        now = time.monotonic()
+        while stack:
+            connection = stack.pop()
+            self.idle_count -= 1
+            # the server could have closed the connection in the meantime
+            if connection.reader.at_eof() or now - connection.last_used > self.idle_timeout:
+                connection.close()
+                self.evicted += 1
+                continue
+            return connection
+        return None
+    
+    # give the connection back to the pool, it is closed if the response did not allow reusing it
+    def release(self, connection, reusable):
+        if reusable and not self.closed:
+            connection.last_used = time.monotonic()
+            self.idle.setdefault(connection.key, []).append(connection)
+            self.idle_count += 1
+        else:
+            connection.close()
+        self.hosts[connection.key].release()
+        self.total.release()
+        self.evict()
+    
+    # close the connections that have been idle for too long and the oldest ones above the limit
+    def evict(self):
+        now = time.monotonic()
+        if self.idle_count <= self.max_connections and now - self.last_sweep < self.idle_timeout / 2:
+            return
+        self.last_sweep = now
+        for key, stack in list(self.idle.items()):
+            alive = [c for c in stack if now - c.last_used <= self.idle_timeout]
+            for connection in stack:
+                if now - connection.last_used > self.idle_timeout:
+                    connection.close()
+                    self.evicted += 1
+            self.idle_count -= len(stack) - len(alive)
+            if alive:
+                self.idle[key] = alive
+            else:
+                del self.idle[key]
+        if self.idle_count > self.max_connections:
+            connections = sorted((c for stack in self.idle.values() for c in stack), key=lambda c: c.last_used)
+            for connection in connections[:self.idle_count - self.max_connections]:
+                self.idle[connection.key].remove(connection)
+                if not self.idle[connection.key]:
+                    del self.idle[connection.key]
+                connection.close()
+                self.evicted += 1
+            self.idle_count = self.max_connections
+    
+    def statistics(self):
+        requests = self.opened + self.reused
+        return {
+            "opened": self.opened,
+            "reused": self.reused,
+            "evicted": self.evicted,
+            "reuse_rate": self.reused / requests if requests > 0 else 0.0,
+            "idle": self.idle_count
+        }
+    
+    def close(self):
+        self.closed = True
+        for stack in self.idle.values():
+            for connection in stack:
+                connection.close()
+        self.idle.clear()
+        self.idle_count = 0
+
+# how many urls are expected to be visited during a crawl (more can be, but the Bloom filter gets less precise)
+VISITED_CAPACITY = 10 ** 6
+# how often the Bloom filter may wrongly report a url as visited (it is then checked on disk)
+VISITED_ERROR_RATE = 0.01
+# how many links waiting to be fetched are kept in memory
+FRONTIER_SIZE = 100000
+# how many links are moved from disk to memory at once
+SPILL_BATCH = 1000
+# the largest robots.txt (in bytes) which is read
+ROBOTS_SIZE = 512 * 2 ** 10
+
+# a Bloom filter never misses an added item, but may report an item which has not been added
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        # the optimal numbers of bits and hash functions
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    # the hash functions are combinations of two halves of a single digest
+    def positions(self, item):
+        digest = blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little")
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+    
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+# the set of visited urls which does not keep them in memory:
+# the Bloom filter answers most questions about new urls and only when it reports a url as visited,
+# the url is looked up in the exact set kept in SQLite (a temporary file unless a path is given)
+class VisitedSet:
+    def __init__(self, path=None, capacity=VISITED_CAPACITY, error_rate=VISITED_ERROR_RATE):
+        self.bloom = BloomFilter(capacity, error_rate)
+        # an empty path makes SQLite create a temporary database which is removed when it is closed
+        self.db = sqlite3.connect(path or "", check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS Visited (url TEXT PRIMARY KEY)")
+        self.count = 0
+        # the urls visited in a previous crawl
+        for (url,) in self.db.execute("SELECT url FROM Visited"):
+            self.bloom.add(url)
+            self.count += 1
+        self.lookups = 0
+        self.false_positives = 0
+    
+    def __contains__(self, url):
+        if url not in self.bloom:
+            return False
+        self.lookups += 1
+        if self.db.execute("SELECT 1 FROM Visited WHERE url = ?", (url,)).fetchone() is not None:
+            return True
+        self.false_positives += 1
+        return False
+    
+    def add(self, url):
+        self.bloom.add(url)
+        if self.db.execute("INSERT OR IGNORE INTO Visited VALUES (?)", (url,)).rowcount > 0:
+            self.count += 1
+            if self.count % 1000 == 0:
+                self.db.commit()
+    
+    def __len__(self):
+        return self.count
+    
+    def statistics(self):
+        return {
+            "visited": self.count,
+            "disk_lookups": self.lookups,
+            "false_positives": self.false_positives
+        }
+    
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+# a FIFO queue of links which keeps at most memory_size of them in memory and spills the rest to SQLite
+# (once some links are on disk, the new ones go there too, so the order is kept)
+class Frontier(asyncio.Queue):
+    def __init__(self, memory_size=FRONTIER_SIZE, path=None):
+        self.memory_size = memory_size
+        self.path = path
+        super().__init__()
+    
+    # asyncio.Queue keeps the items in the structure created by _init and accesses it through _put and _get,
+    # but qsize and empty use len(self._queue) directly, so they are overridden to count the links on disk too
+    # (full uses qsize)
+    def _init(self, maxsize):
+        self._queue = deque()
+        self.db = None
+        self.spilled = 0
+    
+    def qsize(self):
+        return len(self._queue) + self.spilled
+    
+    def empty(self):
+        return self.qsize() == 0
+    
+    def _put(self, link):
+        if self.spilled == 0 and len(self._queue) < self.memory_size:
+            self._queue.append(link)
+            return
+        if self.db is None:
+            self.db = sqlite3.connect(self.path or "", check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS Links (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, depth INTEGER)")
+        self.db.execute("INSERT INTO Links (url, depth) VALUES (?, ?)", link)
+        self.spilled += 1
+    
+    def _get(self):
+        if not self._queue:
+            # load the oldest links back to memory
+            rows = self.db.execute("SELECT id, url, depth FROM Links ORDER BY id LIMIT ?", (self.memory_size,)).fetchall()
+            self.db.execute("DELETE FROM Links WHERE id <= ?", (rows[-1][0],))
+            self.spilled -= len(rows)
+            self._queue.extend((url, depth) for _, url, depth in rows)
+        return self._queue.popleft()
+    
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        self.spilled = 0
+
+# a persistent cache of pages which are sent with an ETag or Last-Modified header
+# when a cached page is requested again, the request is conditional, so if the page has not changed the server responds
+# with a short 304 Not Modified and the page is taken from the cache
+# the least recently used pages are removed when the cache grows over max_size bytes
+# the changes are committed in batches (see CACHE_COMMIT_BATCH), the rest of them by commit or close
+class HTTPCache:
+    def __init__(self, path, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        # the cache is used by one thread at a time, but not necessarily the one which created it
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS Responses "
+            "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_type TEXT, body BLOB, size INTEGER, used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS ResponsesUsed ON Responses (used)")
+        self.db.commit()
+        self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM Responses").fetchone()[0]
+        # the limit could have been lowered since the cache was used last time
+        self.shrink()
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+        # the number of changes since the last commit
+        self.changes = 0
+    
+    def key(self, url):
+        return normalize_url(url)
+    
+    # the headers making the request for the url conditional
+    def validators(self, url):
+        row = self.db.execute("SELECT etag, last_modified FROM Responses WHERE url = ?", (self.key(url),)).fetchone()
+        if row is None:
+            return []
+        etag, last_modified = row
+        headers = []
+        if etag is not None:
+            headers.append(("If-None-Match", etag))
+        if last_modified is not None:
+            headers.append(("If-Modified-Since", last_modified))
+        return headers
+    
+    @staticmethod
+    def cacheable(headers):
+        if "no-store" in headers.get("cache-control", "").lower():
+            return False
+        return "etag" in headers or "last-modified" in headers
+    
+    # the server has responded with 304 Not Modified: return the content type and the body of the cached page (or None)
+    def hit(self, url):
+        key = self.key(url)
+        row = self.db.execute("SELECT content_type, body FROM Responses WHERE url = ?", (key,)).fetchone()
+        # the page could have been evicted since the request was sent
+        if row is None:
+            return None
+        self.db.execute("UPDATE Responses SET used = ? WHERE url = ?", (time.time(), key))
+        self.changed()
+        self.hits += 1
+        return row
+    
+    # the server has sent the whole page (body is None if it should not be cached)
+    def update(self, url, headers, body):
+        self.misses += 1
+        key = self.key(url)
+        self.remove(key)
+        if body is None or len(body) > self.max_size:
+            self.changed()
+            return
+        self.db.execute(
+            "INSERT INTO Responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, headers.get("etag"), headers.get("last-modified"), headers.get("content-type"), body, len(body), time.time())
+        )
+        self.size += len(body)
+        self.shrink()
+        self.changed()
+    
+    def changed(self):
+        self.changes += 1
+        if self.changes >= CACHE_COMMIT_BATCH:
+            self.commit()
+    
+    def commit(self):
+        self.db.commit()
+        self.changes = 0
+    
+    def close(self):
+        self.commit()
+        self.db.close()
+    
+    # remove the least recently used pages until the cache fits in max_size bytes
+    def shrink(self):
+        if self.size <= self.max_size:
+            return
+        for key, _ in self.db.execute("SELECT url, size FROM Responses ORDER BY used").fetchall():
+            self.remove(key)
+            if self.size <= self.max_size:
+                break
+    
+    def remove(self, key):
+        row = self.db.execute("SELECT size FROM Responses WHERE url = ?", (key,)).fetchone()
+        if row is not None:
+            self.db.execute("DELETE FROM Responses WHERE url = ?", (key,))
+            self.size -= row[0]
+    
+    def statistics(self):
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests > 0 else 0.0,
+            "entries": self.db.execute("SELECT COUNT(*) FROM Responses").fetchone()[0],
+            "size": self.size
+        }
+
+# a minimal HTTP/1.1 client built on asyncio streams, so that every fetch is a cheap coroutine instead of a thread
+async def read_head(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by the server")
+    version, status, *reason = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+    headers = {}
     while True:
-        # consume link
-        element = links.get(block=True)
-        if element is None:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
             break
-        url, depth = element
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        value = value.strip()
+        headers[name] = headers[name] + ", " + value if name in headers else value
+    return version, int(status), " ".join(reason), headers
+
+# yield the body of the response chunk by chunk
+async def read_body(reader, status, headers):
+    if status in (204, 304):
+        return
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # skip the trailer
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        left = int(headers["content-length"])
+        while left > 0:
+            chunk = await reader.read(min(left, 65536))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", left)
+            left -= len(chunk)
+            yield chunk
+    else:
+        # the server marks the end of the body by closing the connection
+        while chunk := await reader.read(65536):
+            yield chunk
+
+def request_head(parts, headers=()):
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    host = parts.hostname.encode("idna").decode("ascii")
+    if parts.port is not None:
+        host += f":{parts.port}"
+    lines = [
+        f"GET {path} HTTP/1.1",
+        f"Host: {host}",
+        f"User-Agent: {USER_AGENT}",
+        "Accept-Encoding: identity"
+    ]
+    lines += [f"{name}: {value}" for name, value in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+# the connection can be reused only if the end of the body was marked without closing it
+def keep_alive(version, status, headers):
+    if version != "HTTP/1.1" or "close" in headers.get("connection", "").lower():
+        return False
+    return status in (204, 304) or "chunked" in headers.get("transfer-encoding", "").lower() or "content-length" in headers
+
+class Response:
+    def __init__(self, version, status, reason, headers, reader):
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.reader = reader
+        # whether the whole body has been read
+        self.complete = False
+    
+    async def chunks(self):
+        async for chunk in read_body(self.reader, self.status, self.headers):
+            yield chunk
+        self.complete = True
+
+# send a request and give the response whose body can be read while the connection is held
+# (the connection goes back to the pool only if the body has been read to the end)
+@contextlib.asynccontextmanager
+async def request(pool, parts, headers=()):
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    while True:
+        connection = await pool.acquire(parts.scheme, parts.hostname, port)
+        try:
+            connection.writer.write(request_head(parts, headers))
+            await connection.writer.drain()
+            version, status, reason, headers = await read_head(connection.reader)
+            break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pool.release(connection, False)
+            # a reused connection may have been closed by the server before it got the request,
+            # so the request is sent again (eventually through a new connection)
+            if connection.requests > 1:
+                continue
+            raise
+        except BaseException:
+            pool.release(connection, False)
+            raise
+    response = Response(version, status, reason, headers, connection.reader)
+    reusable = False
+    try:
+        yield response
+        reusable = response.complete and keep_alive(version, status, headers)
+    finally:
+        pool.release(connection, reusable)
+
+# the media type and the charset from the Content-Type header
+def content_type(value):
+    media_type, *parameters = value.split(";")
+    charset = None
+    for parameter in parameters:
+        name, _, parameter_value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            charset = parameter_value.strip().strip("\"'") or None
+    return media_type.strip().lower(), charset
+
+# decodes the body of a page as it arrives
+# the text is kept or, if only the text is needed, fed into a PageScanner at once
+class PageDecoder:
+    def __init__(self, charset=None, scan=False, max_size=MAX_SIZE):
+        # the charset from the Content-Type header
+        self.charset = charset
+        self.scanner = PageScanner() if scan else None
+        self.max_size = max_size
+        self.size = 0
+        self.parts = []
+        # the beginning of the page which is kept until the charset is known
+        self.head = b""
+        self.decoder = None
+    
+    def feed(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise PageTooLarge(f"The page is larger than {self.max_size} bytes")
+        if self.decoder is None:
+            self.head += chunk
+            if len(self.head) < SNIFF_SIZE:
+                return
+            chunk, self.head = self.head, b""
+            self.start(chunk)
+        self.write(self.decoder.decode(chunk))
+    
+    # choose the charset like browsers do: a byte order mark, the header, a meta tag and UTF-8 as the default
+    def start(self, head):
+        charset = None
+        for bom, name in BOMS:
+            if head.startswith(bom):
+                charset = name
+                break
+        if charset is None:
+            charset = self.charset
+        if charset is None:
+            match = META_CHARSET_RE.search(head[:SNIFF_SIZE])
+            if match:
+                charset = match.group(1).decode("ascii")
+                # the page could not have been read if it was really encoded in UTF-16
+                if charset.lower().startswith("utf-16"):
+                    charset = "utf-8"
+        # unknown charsets and codecs which do not decode text (e.g. "hex" or "base64") fall back to UTF-8
+        try:
+            if not codecs.lookup(charset or "utf-8")._is_text_encoding:
+                charset = None
+        except LookupError:
+            charset = None
+        self.decoder = codecs.getincrementaldecoder(charset or "utf-8")(errors="replace")
+    
+    def write(self, text):
+        if not text:
+            return
+        if self.scanner is None:
+            self.parts.append(text)
+        else:
+            self.scanner.feed(text)
+    
+    # return the content of the page or, if it has been scanned, a pair (links, strings)
+    def close(self):
+        head = b""
+        if self.decoder is None:
+            head, self.head = self.head, b""
+            self.start(head)
+        self.write(self.decoder.decode(head, final=True))
+        if self.scanner is None:
+            return "".join(self.parts)
+        self.scanner.close()
+        return self.scanner.links, self.scanner.strings
+
+# return the url of the page (after following redirects) and its content (see PageDecoder.close)
+# the body is streamed and the pages which are not HTML or are too large are rejected without downloading them
+# if a cache is given, the pages in it are only revalidated
+# (types are the accepted media types, None means any)
+async def fetch(url, pool, document="html", max_size=MAX_SIZE, cache=None, types=HTML_TYPES):
+    for _ in range(REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {parts.scheme}")
+        validators = cache.validators(url) if cache is not None else []
+        async with request(pool, parts, validators) as response:
+            status, headers = response.status, response.headers
+            if status in REDIRECT_CODES and "location" in headers:
+                # read the (usually empty) body, so that the connection can be reused
+                async for _ in response.chunks():
+                    pass
+                url = urllib.parse.urljoin(url, quote_link(headers["location"]))
+                continue
+            if status == 304 and validators:
+                async for _ in response.chunks():
+                    pass
+                cached = cache.hit(url)
+                if cached is None:
+                    # request the page again, this time unconditionally
+                    continue
+                cached_type, body = cached
+                page = PageDecoder(content_type(cached_type or "text/html")[1], document == "text", max_size)
+                page.feed(body)
+                return url, page.close()
+            if not 200 <= status < 300:
+                raise HTTPError(status, response.reason)
+            media_type, charset = content_type(headers.get("content-type", "text/html"))
+            if types is not None and media_type not in types:
+                raise UnsupportedContent(f"Not an HTML page: {media_type}")
+            if int(headers.get("content-length", 0)) > max_size:
+                raise PageTooLarge(f"The page is larger than {max_size} bytes")
+            page = PageDecoder(charset, document == "text", max_size)
+            body = [] if cache is not None and HTTPCache.cacheable(headers) else None
+            async for chunk in response.chunks():
+                page.feed(chunk)
+                if body is not None:
+                    body.append(chunk)
+            content = page.close()
+            if cache is not None:
+                cache.update(url, headers, b"".join(body) if body is not None else None)
+            return url, content
+    raise HTTPError(status, "Too many redirects")
+
+# the key of the host of the url (the pages are fetched from their original urls, which need not be normalized)
+def host_key(url):
+    parts = urllib.parse.urlsplit(url)
+    return parts.scheme.lower(), parts.netloc.lower()
+
+# the politeness state of a host, shared by all crawls of a crawler
+class Host:
+    def __init__(self, delay):
+        # how many pages from the host are being fetched
+        self.active = 0
+        self.delay = delay
+        # when the next request to the host may be sent
+        self.next_start = 0.0
+        # None until robots.txt is read (and if it is not read at all)
+        self.robots = None
+        self.ready = False
+        # the queues of the crawls which have links to the host
+        self.queues = set()
+
+# the links of a single crawl to a single host
+class HostQueue:
+    def __init__(self, host, scheduler):
+        self.host = host
+        self.scheduler = scheduler
+        # a heap of tuples (priority, number, url, depth)
+        self.queue = []
+        # whether the queue is in the heap of queues waiting for a worker
+        self.scheduled = False
+
+# the hosts visited by the crawls of a crawler: no host gets more than per_host requests at a time (from all crawls)
+# and the requests to a host start at least delay seconds apart (or as many as robots.txt asks for with Crawl-delay)
+# robots.txt of every host is read once and kept as long as the crawler runs
+# the wakeup event is set whenever a link may have become ready to be fetched
+class Hosts:
+    def __init__(self, pool, wakeup, timeout=TIMEOUT, per_host=PER_HOST, delay=HOST_DELAY, robots=True):
+        self.pool = pool
+        self.wakeup = wakeup
+        self.timeout = timeout
+        self.per_host = per_host
+        self.delay = delay
+        self.robots = robots
+        # (scheme, netloc) -> Host
+        self.hosts = {}
+        self.tasks = set()
+    
+    def get(self, key):
+        host = self.hosts.get(key)
+        if host is None:
+            host = self.hosts[key] = Host(self.delay)
+            if self.robots and key[0] in DEFAULT_PORTS:
+                task = asyncio.create_task(self.read_robots(host, *key))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            else:
+                host.ready = True
+        return host
+    
+    def host(self, url):
+        return self.hosts[host_key(url)]
+    
+    # let the crawls waiting for the host know that it may be sent a request
+    def notify(self, host):
+        for queue in list(host.queues):
+            queue.scheduler.schedule(queue)
+    
+    async def read_robots(self, host, scheme, netloc):
+        robots = urllib.robotparser.RobotFileParser()
         try:
-            req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-            with urllib.request.urlopen(req) as page:
-                content = page.read().decode("utf-8")
+            url = urllib.parse.urlunsplit((scheme, netloc, "/robots.txt", "", ""))
+            _, text = await asyncio.wait_for(fetch(url, self.pool, max_size=ROBOTS_SIZE, types=None), self.timeout)
+            robots.parse(text.splitlines())
+            delay = robots.crawl_delay(USER_AGENT)
+            if delay is not None:
+                host.delay = max(host.delay, float(delay))
+        except HTTPError as e:
+            # like RobotFileParser.read: the host is off limits if robots.txt is forbidden, otherwise everything is allowed
+            if e.status in (401, 403):
+                robots.disallow_all = True
+            else:
+                robots.allow_all = True
+        except Exception:
+            # the host is unreachable, which the workers will find out by themselves
+            robots.allow_all = True
+        host.robots = robots
+        host.ready = True
+        self.notify(host)
+    
+    def allowed(self, url):
+        robots = self.host(url).robots
+        return robots is None or robots.can_fetch(USER_AGENT, url)
+    
+    # a link to the host is going to be fetched
+    def start(self, host, url, now):
+        host.active += 1
+        # a link which is not going to be fetched does not delay the next request
+        if self.allowed(url):
+            host.next_start = now + host.delay
+    
+    # the link has been fetched (or the fetch has failed)
+    def done(self, url):
+        host = self.host(url)
+        host.active -= 1
+        self.notify(host)
+    
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+# the scheduler hands the links of a crawl to the workers within the politeness limits of the shared Hosts
+# every host has its own queue ordered by priority (by default the depth, so the crawl stays breadth-first)
+# and the hosts which may be sent a request are served in the order they became available, so a host with many links
+# does not hold up the others and the workers are spread over all hosts
+# at most memory_size links are kept in the queues, the rest waits on disk in a Frontier
+# (the order of priorities is kept only among the links in memory)
+class Scheduler:
+    def __init__(self, hosts, priority=None, memory_size=FRONTIER_SIZE):
+        self.hosts = hosts
+        self.priority = priority
+        self.memory_size = memory_size
+        # (scheme, netloc) -> HostQueue
+        self.queues = {}
+        # a heap of tuples (time, number, queue) with the queues which have links to fetch
+        # (the time may be out of date if another crawl has sent a request to the host in the meantime)
+        self.waiting = []
+        self.numbers = itertools.count()
+        # how many links are in the queues of the hosts
+        self.queued = 0
+        self.overflow = Frontier(SPILL_BATCH)
+    
+    def put(self, url, depth):
+        if self.queued >= self.memory_size or self.overflow.qsize() > 0:
+            self.overflow.put_nowait((url, depth))
+        else:
+            self.enqueue(url, depth)
+    
+    def enqueue(self, url, depth):
+        key = host_key(url)
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = HostQueue(self.hosts.get(key), self)
+        queue.host.queues.add(queue)
+        priority = depth if self.priority is None else self.priority(url, depth)
+        heapq.heappush(queue.queue, (priority, next(self.numbers), url, depth))
+        self.queued += 1
+        self.schedule(queue)
+    
+    def schedule(self, queue):
+        host = queue.host
+        if host.ready and not queue.scheduled and queue.queue and host.active < self.hosts.per_host:
+            queue.scheduled = True
+            heapq.heappush(self.waiting, (host.next_start, next(self.numbers), queue))
+            self.hosts.wakeup.set()
+    
+    def allowed(self, url):
+        return self.hosts.allowed(url)
+    
+    # when the next link may be fetched (None if no host is waiting for a worker)
+    def next_time(self):
+        return self.waiting[0][0] if self.waiting else None
+    
+    # take a link which may be fetched now (or None if there is no such link)
+    def poll(self, now):
+        while self.waiting and self.waiting[0][0] <= now:
+            queue = heapq.heappop(self.waiting)[2]
+            host = queue.host
+            if host.active >= self.hosts.per_host:
+                # the host is busy with the links of other crawls, it will be scheduled again when one of them is done
+                queue.scheduled = False
+                continue
+            if host.next_start > now:
+                heapq.heappush(self.waiting, (host.next_start, next(self.numbers), queue))
+                continue
+            queue.scheduled = False
+            _, _, url, depth = heapq.heappop(queue.queue)
+            self.queued -= 1
+            if not queue.queue:
+                host.queues.discard(queue)
+            self.hosts.start(host, url, now)
+            self.schedule(queue)
+            while self.queued < self.memory_size and self.overflow.qsize() > 0:
+                self.enqueue(*self.overflow.get_nowait())
+            return url, depth
+        return None
+    
+    # the link given by poll has been fetched (or the fetch has failed)
+    def done(self, url):
+        self.hosts.done(url)
+    
+    async def close(self):
+        for queue in self.queues.values():
+            queue.host.queues.discard(queue)
+        self.overflow.close()
+
+# what the action is given:
+# "html" - the HTML code of the page,
+# "soup" - the page parsed by BeautifulSoup (the same tree in which the links are found),
+# "text" - a list of strings from the page, found by PageScanner without building a tree
+#          (the page is scanned while it is being downloaded, so the parsing processes only apply the action)
+DOCUMENTS = ("html", "soup", "text")
+
+# runs in a worker process: apply the action to the page and find all "proper" links on it (if they are going to be followed)
+# the page is parsed at most once (if the document is "text", content is a pair (links, strings) from PageScanner)
+def process_page(content, base, follow, action, document):
+    links = []
+    if document == "text":
+        links, content = content
+    elif follow or document == "soup":
+        soup = bs4.BeautifulSoup(content, "html.parser")
+        if follow:
+            links = [link.get("href") for link in soup.find_all("a", href=LINK_RE)]
+        if document == "soup":
+            content = soup
+    pages = []
+    if follow:
+        for link in links:
+            # the link may be relative, so I join it with the url the page was finally fetched from
+            # if it is absolute, urljoin will not try to join it
+            # (the fragment is not sent to the server)
+            pages.append(urllib.parse.urldefrag(urllib.parse.urljoin(base, quote_link(link)))[0])
+    return action(content), pages
+
+# the state of a single crawl: its own frontier and its own set of processed links
+class Crawl:
+    def __init__(self, crawler, depth, action, document, priority, frontier_size):
+        if document not in DOCUMENTS:
+            raise ValueError(f"Unknown document type: {document}")
+        self.max_depth = depth
+        self.action = action
+        self.document = document
+        # a set of already processed links (in the normalized form)
+        self.processed = VisitedSet()
+        # hands out tuples (url, depth)
+        self.links = Scheduler(crawler.hosts, priority, frontier_size)
+        # stores tuples (url, action result or exception, links found on the page, depth)
+        self.parsed = asyncio.Queue()
+        # how many pages are left
+        self.counter = 0
+        # how many pages are being fetched or parsed or wait for the caller
+        self.in_flight = 0
+        self.closed = False
+    
+    def add(self, url, depth):
+        try:
+            key = normalize_url(url)
+        except ValueError:
+            # e.g. an invalid port
+            return
+        # no links will be processed twice
+        if key not in self.processed:
+            self.processed.add(key)
+            # produce link
+            self.links.put(url, depth)
+            self.counter += 1
+    
+    async def close(self):
+        self.closed = True
+        await self.links.close()
+        self.processed.close()
+
+# a crawler owns the workers fetching and parsing pages, the connection pool and the parsing processes,
+# which are shared by all the crawls it runs (at the same time, each with its own frontier)
+# it can be used by asynchronous code inside its event loop:
+#     async with Crawler() as crawler:
+#         async for url, result in crawler.acrawl(start_page, depth, action): ...
+# or by synchronous code (also from many threads), and then it runs its event loop in a thread of its own:
+#     with Crawler() as crawler:
+#         for url, result in crawler.crawl(start_page, depth, action): ...
+# a page which could not be fetched or processed is reported as (url, exception)
+# I'm fetching and processing links in breadth-first order using queues,
+# but the fetching is done by coroutines running in a single thread, so thousands of them can wait for the network at once
+# (concurrency bounds how many requests are in flight)
+# the pages are parsed in other processes (by default), because parsing is CPU-bound and would block the fetching
+# (the action is sent to the parsing processes, so it has to be picklable, otherwise a ThreadPoolExecutor can be given as the parser)
+# every crawl may have at most QUEUE_SIZE pages in progress, so a crawl whose caller does not consume the results
+# stops fetching instead of filling the memory or holding up the other crawls
+# the pages are revalidated instead of downloaded again if they are in the given HTTPCache
+# the links are handed to the workers by a Scheduler of every crawl, but the politeness limits (per_host, delay
+# and robots, see Hosts) are kept by the crawler, so they apply to all its crawls together and robots.txt of a host
+# is read once; all crawls share the connection limits of the pool too
+class Crawler:
+    def __init__(
+        self, concurrency=CONCURRENCY, timeout=TIMEOUT, processes=PROCESSES, parser=None, max_size=MAX_SIZE, cache=None,
+        per_host=PER_HOST, delay=HOST_DELAY, robots=True
+    ):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.processes = processes
+        self.parser = parser
+        self.own_parser = parser is None
+        self.max_size = max_size
+        self.cache = cache
+        self.per_host = per_host
+        self.delay = delay
+        self.robots = robots
+        self.pool = None
+        self.hosts = None
+        self.workers = []
+        # the crawls which are running (they are given links in turns)
+        self.crawls = deque()
+        self.loop = None
+        # the thread running the event loop if the crawler is used synchronously
+        self.thread = None
+    
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.pool = ConnectionPool()
+        if self.own_parser:
+            self.parser = ProcessPoolExecutor(self.processes)
+        self.wakeup = asyncio.Event()
+        self.hosts = Hosts(self.pool, self.wakeup, self.timeout, self.per_host, self.delay, self.robots)
+        self.stopping = False
+        # stores tuples (crawl, url, base url, content, depth, exception)
+        self.contents = asyncio.Queue()
+        self.workers = [asyncio.create_task(self.get_content()) for _ in range(self.concurrency)]
+        # keep every process busy while the next page is being sent to it
+        self.workers += [asyncio.create_task(self.parse_content()) for _ in range(2 * self.processes)]
+    
+    async def stop(self):
+        # asyncio.wait_for may swallow a cancellation (when what it waits for finishes at the same time),
+        # so the workers also check this flag before waiting for the next link
+        self.stopping = True
+        self.wakeup.set()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        await self.hosts.close()
+        self.pool.close()
+        if self.cache is not None:
+            self.cache.commit()
+        if self.own_parser:
+            self.parser.shutdown(wait=True, cancel_futures=True)
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, *exception):
+        await self.stop()
+    
+    def open(self):
+        loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=loop.run_forever, name="Crawler")
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), loop).result()
+    
+    def close(self):
+        if self.thread is None:
+            return
+        loop = self.loop
+        asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+        # the threads resolving host names
+        asyncio.run_coroutine_threadsafe(loop.shutdown_default_executor(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self.thread.join()
+        loop.close()
+        self.thread = None
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, *exception):
+        self.close()
+    
+    # wait for a link which may be fetched now, the crawls are asked in turns
+    async def next_link(self):
+        while True:
+            if self.stopping:
+                raise asyncio.CancelledError()
+            now = time.monotonic()
+            soonest = None
+            for _ in range(len(self.crawls)):
+                crawl = self.crawls[0]
+                self.crawls.rotate(-1)
+                if crawl.in_flight >= QUEUE_SIZE:
+                    continue
+                link = crawl.links.poll(now)
+                if link is not None:
+                    crawl.in_flight += 1
+                    return crawl, link
+                ready = crawl.links.next_time()
+                if ready is not None and (soonest is None or ready < soonest):
+                    soonest = ready
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), None if soonest is None else soonest - now)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def get_content(self):
+        while True:
+            # consume link
+            crawl, (url, depth) = await self.next_link()
+            base = content = error = None
+            try:
+                if not crawl.links.allowed(url):
+                    raise Disallowed("Disallowed by robots.txt")
+                base, content = await asyncio.wait_for(
+                    fetch(url, self.pool, crawl.document, self.max_size, self.cache), self.timeout
+                )
+            except Exception as e:
+                error = e
+            finally:
+                crawl.links.done(url)
             # produce content
-            contents.put((url, content, depth))
-        except Exception as e:
-            print(str(e))
-            contents.put(None)
-
-# stores tuples (url, depth)
-links = queue.Queue()
-# stores tuples (url, content, depth)
-contents = queue.Queue()
-
-THREADS_COUNT = 10
-
-threads = [threading.Thread(target=get_content) for _ in range(THREADS_COUNT)]
-for t in threads:
-    t.start()
-page = "https://github.com/TWolczanski/linux-autoscroll"
-for x in crawl(page, 1, find_sentences):
-    print(x)
-print()
-
-threads = [threading.Thread(target=get_content) for _ in range(THREADS_COUNT)]
-for t in threads:
-    t.start()
-page = "https://zapisy.ii.uni.wroc.pl/courses/kurs-rozszerzony-jezyka-python-202122-zimowy"
-for x in crawl(page, 1, find_sentences):
-    print(x)
-print()
-
-# this can take long time to finish
-# threads = [threading.Thread(target=get_content) for _ in range(THREADS_COUNT)]
-# for t in threads:
-#     t.start()
-# page = "https://code.visualstudio.com/docs/languages/python"
-# for x in crawl(page, 1, find_sentences):
-#     print(x)
-# print()
-
-threads = [threading.Thread(target=get_content) for _ in range(THREADS_COUNT)]
-for t in threads:
-    t.start()
-page = "https://sites.google.com/cs.uni.wroc.pl/boehm/python_parsing"
-for x in crawl(page, 1, find_sentences):
-    print(x)
\ No newline at end of file
+            self.contents.put_nowait((crawl, url, base, content, depth, error))
+    
+    async def parse_content(self):
+        while True:
+            # consume content
+            crawl, url, base, content, depth, error = await self.contents.get()
+            if crawl.closed:
+                continue
+            result, pages = error, []
+            if error is None:
+                try:
+                    result, pages = await self.loop.run_in_executor(
+                        self.parser, process_page, content, base, depth < crawl.max_depth, crawl.action, crawl.document
+                    )
+                except Exception as e:
+                    result = e
+            # produce parsed page
+            crawl.parsed.put_nowait((url, result, pages, depth))
+    
+    # document says what the action is given (see DOCUMENTS)
+    # and the links waiting to be fetched above frontier_size are moved to disk
+    async def acrawl(self, start_page, depth, action, document="html", priority=None, frontier_size=FRONTIER_SIZE):
+        crawl = Crawl(self, depth, action, document, priority, frontier_size)
+        self.crawls.append(crawl)
+        try:
+            crawl.add(urllib.parse.urldefrag(quote_link(start_page))[0], 0)
+            while crawl.counter > 0:
+                # consume parsed page
+                url, result, pages, depth = await crawl.parsed.get()
+                crawl.counter -= 1
+                crawl.in_flight -= 1
+                self.wakeup.set()
+                for p in pages:
+                    crawl.add(p, depth + 1)
+                yield (url, result)
+        finally:
+            # also when the caller stops iterating early
+            self.crawls.remove(crawl)
+            await crawl.close()
+    
+    # a synchronous version of acrawl (the crawler has to be opened with open or a with statement)
+    def crawl(self, start_page, depth, action, **options):
+        pages = self.acrawl(start_page, depth, action, **options)
+        
+        async def next_page():
+            try:
+                return True, await pages.__anext__()
+            except StopAsyncIteration:
+                return False, None
+        
+        async def close_pages():
+            await pages.aclose()
+        
+        try:
+            while True:
+                found, page = asyncio.run_coroutine_threadsafe(next_page(), self.loop).result()
+                if not found:
+                    break
+                yield page
+        finally:
+            asyncio.run_coroutine_threadsafe(close_pages(), self.loop).result()
+
+# a single crawl with a crawler of its own (options are the arguments of Crawler and Crawler.acrawl)
+async def acrawl(start_page, depth, action, **options):
+    crawl_options = {name: options.pop(name) for name in ("document", "priority", "frontier_size") if name in options}
+    async with Crawler(**options) as crawler:
+        async for page in crawler.acrawl(start_page, depth, action, **crawl_options):
+            yield page
+
+def crawl(start_page, depth, action, **options):
+    crawl_options = {name: options.pop(name) for name in ("document", "priority", "frontier_size") if name in options}
+    with Crawler(**options) as crawler:
+        yield from crawler.crawl(start_page, depth, action, **crawl_options)
+
+# hand out links through a Scheduler which keeps only a few of them in memory, so most of them go through the disk
+# (the links are spread over a few hosts, are put at the same depth and are all expected back in the order they were put)
+async def check_spill(count=3000, memory_size=3, hosts=7):
+    scheduler = Scheduler(Hosts(None, asyncio.Event(), per_host=1, delay=0, robots=False), memory_size=memory_size)
+    for i in range(count):
+        scheduler.put(f"http://host{i % hosts}.example/{i}", 0)
+    spilled = scheduler.overflow.spilled
+    urls = []
+    while True:
+        link = scheduler.poll(time.monotonic())
+        if link is None:
+            break
+        urls.append(link[0])
+        scheduler.done(link[0])
+    await scheduler.close()
+    assert spilled > 0
+    assert sorted(urls, key=lambda url: int(url.rsplit("/", 1)[1])) == [f"http://host{i % hosts}.example/{i}" for i in range(count)]
+    assert scheduler.queued == 0 and scheduler.overflow.qsize() == 0
+
+if __name__ == "__main__":
+    asyncio.run(check_spill())
+    
+    # the crawls share the workers and the connections of a single crawler
+    with Crawler() as crawler:
+        page = "https://github.com/TWolczanski/linux-autoscroll"
+        for x in crawler.crawl(page, 1, python_sentences, document="text"):
+            print(x)
+        print()
+        
+        page = "https://zapisy.ii.uni.wroc.pl/courses/kurs-rozszerzony-jezyka-python-202122-zimowy"
+        for x in crawler.crawl(page, 1, python_sentences, document="text"):
+            print(x)
+        print()
+        
+        # this can take long time to finish
+        # page = "https://code.visualstudio.com/docs/languages/python"
+        # for x in crawler.crawl(page, 1, python_sentences, document="text"):
+        #     print(x)
+        # print()
+        
+        page = "https://sites.google.com/cs.uni.wroc.pl/boehm/python_parsing"
+        for x in crawler.crawl(page, 1, python_sentences, document="text"):
+            print(x)